@@ -1,8 +1,11 @@
 import networkx as nx
 import pandas as pd
+import numpy as np
 from metric_calculator import MetricCalculator
 from attack_strategy import AttackStrategy
+from threshold_sweep import required_losses
 import copy
+from contextlib import nullcontext
 
 
 class Graph():
@@ -18,12 +21,49 @@ class Graph():
         Utility to compute various metrics on the graph.
     metrics_trend : dict
         Stores the trends of metrics computed over operations on the graph.
+    instrumentation : Instrumentation
+        Optional instrumentation timing the notifications sent to the attack strategy.
+    species_names : np.ndarray
+        Name table of the species, in the order of the nodes of the initial graph.
+    species_ids : dict
+        Integer id of every species, i.e. its position in the name table.
+    extinction_threshold : float
+        Fraction of its initial prey a consumer must lose to go extinct in a cascade, 1.0 meaning all of them.
+        Also stored as a graph attribute of nx_graph, which is passed to the attack strategy.
+    initial_prey : dict
+        Number of prey of every species in the initial graph, not counting itself.
+    required_losses : dict
+        Number of prey losses at which every consumer goes extinct, derived from the extinction threshold.
     """
 
-    def __init__(self, attack_strategy: AttackStrategy, edge_df: pd.DataFrame, source: str, target: str) -> None:
+    def __init__(self, attack_strategy: AttackStrategy, edge_df: pd.DataFrame, source: str, target: str,
+                 extinction_threshold: float = 1.0) -> None:
+        self._initialize(attack_strategy, self.load_data(edge_df, source, target), extinction_threshold)
+
+
+    @classmethod
+    def from_nx_graph(cls, attack_strategy: AttackStrategy, nx_graph: nx.DiGraph, extinction_threshold: float = 1.0) -> 'Graph':
+        """
+        Creates a Graph around an already loaded (reversed) NetworkX graph, e.g. a copy of a shared base graph.
+        """
+        graph = cls.__new__(cls)
+        graph._initialize(attack_strategy, nx_graph, extinction_threshold)
+        return graph
+
+
+    def _initialize(self, attack_strategy: AttackStrategy, nx_graph: nx.DiGraph, extinction_threshold: float) -> None:
+        if not 0 < extinction_threshold <= 1:
+            raise ValueError("The extinction threshold must be in (0, 1]")
         self.attack_strategy = attack_strategy
         self.metric_calculator = MetricCalculator()
-        self.nx_graph = self.load_data(edge_df, source, target)
+        self.nx_graph = nx_graph
+        self.instrumentation = None
+        self.species_names = np.array(list(nx_graph.nodes), dtype=object)
+        self.species_ids = {name: i for i, name in enumerate(self.species_names)}
+        self.extinction_threshold = extinction_threshold
+        self.nx_graph.graph['extinction_threshold'] = extinction_threshold  # for strategies which depend on it
+        self.initial_prey = {node: nx_graph.in_degree(node) - nx_graph.has_edge(node, node) for node in nx_graph}
+        self.required_losses = {node: int(required_losses(prey, extinction_threshold)) for node, prey in self.initial_prey.items()}
 
 
     # TODO: reverse dataset instead of graph
@@ -32,6 +72,15 @@ class Graph():
         return nx.reverse(g)
     
 
+    def alive_mask(self) -> np.ndarray:
+        """
+        Returns whether every species of the name table is still in the graph.
+        """
+        alive = np.zeros(len(self.species_names), dtype=bool)
+        alive[[self.species_ids[node] for node in self.nx_graph]] = True
+        return alive
+
+
     def setup_attack_strategy(self) -> None:
         self.attack_strategy.setup_attack_strategy(self.nx_graph)
     
@@ -55,7 +104,8 @@ class Graph():
     def remove_node_and_dependents(self, node: str) -> list:
         """
         Removes the specified node from the graph and also removes any dependent nodes 
-        that might be affected by this removal (like isolated nodes).
+        that might be affected by this removal (like isolated nodes), i.e. consumers which lost
+        the share of their initial prey given by the extinction threshold.
         
         Parameters:
         -----------
@@ -64,13 +114,13 @@ class Graph():
         
         Returns:
         -----------
-        removed_neighbors: list
-            The dependent nodes which have been removed.
+        removed_dependents: list
+            The dependent nodes which have been removed, over all levels of the cascade.
         """
-        k_level_neighbors = set(self.nx_graph.successors(node))
+        k_level_neighbors = set(self.nx_graph.successors(node)) - {node}  # without the self-loop of a cannibal
         self.nx_graph.remove_node(node)
 
-        removed_neighbors = set()
+        removed_dependents = []
 
         # Explore neighbors level after level
         while len(k_level_neighbors) > 0:
@@ -84,8 +134,9 @@ class Graph():
 
                 for neighbor in set(k_level_neighbors):  # TODO: check scenario of copying set and without
                     
-                    # A node is removed if it does not have any inward edge, if it's isolated, or if it's an isolated self-loop
-                    if self.nx_graph.in_degree(neighbor) == 0 or self.nx_graph.degree(neighbor) == 0 or (self.nx_graph.in_degree(neighbor) == 1 and self.nx_graph.has_edge(neighbor, neighbor)):
+                    # A node is removed once it lost the required share of its initial prey (self-loops aside),
+                    # with the default threshold once it does not have any inward edge or only a self-loop
+                    if self._is_extinct(neighbor):
                         new_level_neighbors.update(set(self.nx_graph.successors(neighbor)))
                         k_level_neighbors.remove(neighbor)
                         removed_neighbors.add(neighbor)
@@ -99,10 +150,17 @@ class Graph():
             k_level_neighbors = new_level_neighbors - removed_neighbors
 
             self._notify_nodes(removed_neighbors)
+            removed_dependents.extend(removed_neighbors)
 
-        return list(removed_neighbors)
+        return removed_dependents
         
 
+    def _is_extinct(self, node: str) -> bool:
+        prey = self.nx_graph.in_degree(node) - self.nx_graph.has_edge(node, node)
+        return prey == 0 or self.initial_prey[node] - prey >= self.required_losses[node]
+
+
     def _notify_nodes(self, removed_neighbors: set) -> None: 
-        self.attack_strategy.notify_nodes(removed_neighbors)
+        with self.instrumentation.phase('notify_nodes') if self.instrumentation else nullcontext():
+            self.attack_strategy.notify_nodes(removed_neighbors)
                 
\ No newline at end of file
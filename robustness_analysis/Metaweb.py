@@ -1,6 +1,7 @@
 import pandas as pd
 import numpy as np
 import random
+import copy
 from enum import Enum
 
 
@@ -51,7 +52,10 @@ class MetawebProcessor:
             all_links = pd.concat([all_links, new_links])
 
         all_links = all_links.drop_duplicates(subset=['Source_Name', 'Source_Name'])
-        sampled_links = all_links.groupby('Source_Name').apply(self._sample_based_on_diet).reset_index(drop=True)
+        if all_links.empty:  # pd.concat raises on an empty list of groups
+            return all_links.drop(columns="Diet_Range")
+        # Concatenate the groups explicitly, recent pandas versions drop the grouping column in groupby().apply()
+        sampled_links = pd.concat([self._sample_based_on_diet(group) for _, group in all_links.groupby('Source_Name')]).reset_index(drop=True)
         sampled_links.drop(columns="Diet_Range", inplace=True)
 
         return sampled_links
@@ -101,25 +105,35 @@ class MetawebProcessor:
         """
         Removes a given percentage of links on nodes that have an in_degree higher than the given threshhold.
         """
+        indices_to_drop = self.sample_links_to_remove(edges_df, link_removal_percentage)
+        edges_df = edges_df.drop(indices_to_drop).reset_index(drop=True)
+        
+        return edges_df
+
+
+    def sample_links_to_remove(self, edges_df: pd.DataFrame, link_removal_percentage=0.9) -> list:
+        """
+        Returns the index labels of the links removed by remove_random_links.
+        The inward edges of all nodes are grouped once instead of filtering the edge list per node.
+        """
 
         in_degrees = edges_df.groupby('Target_Name').size()
         threshhold = in_degrees.median()
 
+        inward_edges_by_node = edges_df.groupby('Target_Name', sort=False).indices
         nodes = edges_df['Source_Name'].unique()
         indices_to_drop = []
 
         for node in nodes:
-            inward_edges = edges_df[edges_df['Target_Name'] == node]
+            positions = inward_edges_by_node.get(node, [])
 
-            in_degree = len(inward_edges)
+            in_degree = len(positions)
             if in_degree >= threshhold:
                 num_to_remove = int(in_degree * link_removal_percentage)
-                to_remove = inward_edges.sample(num_to_remove)
+                to_remove = edges_df.iloc[positions].sample(num_to_remove)
                 indices_to_drop.extend(to_remove.index.tolist())
 
-        edges_df = edges_df.drop(indices_to_drop).reset_index(drop=True)
-        
-        return edges_df
+        return indices_to_drop
     
 
 class ProcessingStrategy(Enum):
@@ -147,6 +161,15 @@ class Metaweb:
         return self.edges
 
 
+    def copy(self) -> object:
+        """
+        Returns a copy of the metaweb which can be set up independently, without reading the csv again.
+        """
+        metaweb = copy.copy(self)
+        metaweb.edges = self.edges.copy()
+        return metaweb
+
+
     def setup(self, strategy: ProcessingStrategy, data_processor: MetawebProcessor) -> None:
         if strategy == ProcessingStrategy.GENERATE_AND_REMOVE:
             self._add_random_links(data_processor)
@@ -1,5 +1,15 @@
 from graph import Graph
+from instrumentation import Instrumentation
+from progress import ProgressEmitter
+from extinction_record import ExtinctionRecord
+from threshold_sweep import ThresholdSweep
+from compact_graph import CompactGraph
+from metric_pipeline import MetricPipeline
+from snapshot import PerturbationSnapshot
+from habitat_metrics import HabitatTracker
 from collections import defaultdict
+import copy
+from contextlib import nullcontext
 
 class Perturbation():
     """
@@ -12,7 +22,9 @@ class Perturbation():
         The graph on which perturbations will be performed.
     """
 
-    def __init__(self, id: float, graph: Graph, save_nodes: bool) -> None:
+    def __init__(self, id: float, graph: Graph, save_nodes: bool, instrumentation: Instrumentation = None,
+                 progress: ProgressEmitter = None, thresholds: list = None, metric_pipeline: MetricPipeline = None,
+                 habitat_tracker: HabitatTracker = None) -> None:
         """
         Initializes the Perturbation with a graph and optional settings.
         
@@ -23,41 +35,142 @@ class Perturbation():
         graph : Graph
             The graph on which perturbations will be performed.
         save_nodes : bool, optional
-            Flag to track nodes during perturbations. Not intended for simulations. Default is False.
+            Flag to record the extinction order (species ids, removal types, steps and triggering
+            primary removals) in an ExtinctionRecord. Default is False.
+        instrumentation : Instrumentation, optional
+            Records wall time and call counts per phase and the cascade sizes. Default is None.
+        progress : ProgressEmitter, optional
+            Pushes progress events to the parent process instead of printing them. Default is None.
+        thresholds : list, optional
+            Extinction thresholds evaluated in a ThresholdSweep against the removal sequence of this perturbation,
+            which must use the most lenient one (Graph.extinction_threshold). Default is None.
+        metric_pipeline : MetricPipeline, optional
+            Computes the metrics asynchronously on snapshots of the graph instead of blocking every step. Default is None.
+        habitat_tracker : HabitatTracker, optional
+            Records the surviving species, edges and mean degree of every habitat at every step. Default is None.
         """
+        if thresholds and max(thresholds) > graph.extinction_threshold:
+            raise ValueError("The graph must use the most lenient extinction threshold of the sweep")
         self.id = "{:04}".format(id)
         self.graph = graph
         self.metric_evolution = {}
         self.save_nodes = save_nodes
-        self.node_evolution = {'removal_type': [], 'node': []}
+        self.extinction_record = ExtinctionRecord(graph.size()) if save_nodes else None
+        self.step = 0
+        self.instrumentation = instrumentation
+        self.graph.instrumentation = instrumentation
+        self.progress = progress
+        self.thresholds = thresholds
+        self.threshold_sweep = None
+        self.metric_pipeline = metric_pipeline
+        self.habitat_tracker = habitat_tracker
 
-    def run(self) -> None:
+    @classmethod
+    def from_snapshot(cls, id: int, snapshot: PerturbationSnapshot, graph: Graph, instrumentation: Instrumentation = None,
+                      progress: ProgressEmitter = None) -> 'Perturbation':
+        """
+        Creates a perturbation continuing a snapshot, with the metrics and extinctions of its prefix.
+
+        Parameters:
+        -----------
+        id : int
+            Identifier for the perturbation.
+        snapshot : PerturbationSnapshot
+            State of the prefix.
+        graph : Graph
+            The graph of the snapshot, as returned by snapshot.restore_graph (or a copy of it).
+        """
+        perturbation = cls(id, graph, snapshot.extinction_record is not None, instrumentation, progress)
+        perturbation.step = snapshot.step
+        perturbation.metric_evolution = copy.deepcopy(snapshot.metric_evolution)
+        perturbation.extinction_record = copy.deepcopy(snapshot.extinction_record)
+        return perturbation
+
+    def run(self, until_step: int = None) -> None:
         """
         Executes the perturbation process on the graph. At each step:
-        1. Metrics are computed and updated.
+        1. Metrics are computed and updated, or submitted to the metric pipeline and collected at the end.
         2. A node is selected for removal.
         3. The chosen node and any dependent nodes are removed from the graph.
         
-        If the `save_nodes` flag is enabled, the nodes removed during each perturbation step are recorded.
-        Progress updates are printed for every 1000 nodes removed.
+        If the `save_nodes` flag is enabled, the nodes removed during each perturbation step are recorded
+        in the extinction record.
+        Progress updates are printed for every 1000 nodes removed, or pushed to the parent process
+        if a ProgressEmitter is set.
+
+        Parameters:
+        -----------
+        until_step : int, optional
+            Stops after this many primary removals, e.g. to take a snapshot of a prefix. Default is None,
+            running until the graph is empty.
         """
-        print(">>> perturbation", self.id, "started")
-        while self.graph.size() > 0:
-            computed_metrics = self.graph.compute_metrics()
-            node = self.graph.choose_node()
-            self._update_metric_evolution(computed_metrics)
-            dependents = self.graph.remove_node_and_dependents(node)
+        if self.progress:
+            self.progress.start(self.graph.size())
+        else:
+            print(">>> perturbation", self.id, "started")
+
+        if self.instrumentation:
+            self.instrumentation.start()
+        if self.thresholds and self.threshold_sweep is None:
+            self.threshold_sweep = ThresholdSweep(CompactGraph.from_nx_graph(self.graph.nx_graph), self.thresholds)
+        alive = self.graph.alive_mask() if self.metric_pipeline else None
+
+        while self.graph.size() > 0 and (until_step is None or self.step < until_step):
+            if self.metric_pipeline:
+                with self._phase('submit_metrics'):
+                    self.metric_pipeline.submit(alive)
+            else:
+                with self._phase('compute_metrics'):
+                    self._update_metric_evolution(self.graph.compute_metrics())
+            if self.habitat_tracker:
+                with self._phase('record_habitat_metrics'):
+                    self.habitat_tracker.record()
+            with self._phase('choose_node'):
+                node = self.graph.choose_node()
+            with self._phase('remove_node_and_dependents'):
+                dependents = self.graph.remove_node_and_dependents(node)
+
+            # Ids of the primary removal followed by its dependents, shared by all the recorders below
+            species_ids = self.graph.species_ids
+            removed = [species_ids[node]] + [species_ids[dependent] for dependent in dependents]
+
+            if self.metric_pipeline:
+                alive[removed] = False
+
+            if self.instrumentation:
+                self.instrumentation.record_cascade(len(dependents))
+
+            if self.threshold_sweep:
+                self.threshold_sweep.remove(removed[0])
+            if self.habitat_tracker:
+                self.habitat_tracker.remove(removed)
 
             if self.save_nodes:
-                self.node_evolution['removal_type'].append("primary")
-                self.node_evolution['node'].append(node)
-                if len(dependents) > 0:
-                    self.node_evolution['removal_type'].extend(["secondary"] * len(dependents))
-                    self.node_evolution['node'].extend(dependent_node for dependent_node in dependents)
+                self.extinction_record.record(self.step, removed[0], removed[1:])
+            self.step += 1
 
-            if self.graph.size() % 1000 == 0:
+            if self.progress:
+                self.progress.update(self.graph.size())
+            elif self.graph.size() % 1000 == 0:
                 print("id:", self.id, "-> size:", self.graph.size())
 
+        if self.metric_pipeline:
+            with self._phase('collect_metrics'):
+                for computed_metrics in self.metric_pipeline.collect():
+                    self._update_metric_evolution(computed_metrics)
+
+        if self.instrumentation:
+            self.instrumentation.stop()
+        if self.progress:
+            self.progress.finish()
+
+
+    def _phase(self, name: str):
+        """
+        Returns a context manager timing the given phase, or a no-op one if instrumentation is disabled.
+        """
+        return self.instrumentation.phase(name) if self.instrumentation else nullcontext()
+
 
     def _update_metric_evolution(self, computed_metrics: dict) -> None:
         """
@@ -72,6 +185,16 @@ class Perturbation():
             self.metric_evolution.setdefault(key, []).append(value)
 
 
+    def snapshot(self) -> PerturbationSnapshot:
+        """
+        Returns the state of the perturbation after its current step, e.g. after run(until_step).
+        """
+        if self.threshold_sweep:
+            raise ValueError("Threshold sweeps cannot be continued from a snapshot")
+        return PerturbationSnapshot(self.step, self.graph.alive_mask(), self.graph.extinction_threshold, self.metric_evolution,
+                                    self.extinction_record, self.graph.attack_strategy)
+
+
     def get_metric_evolution(self) -> dict:
         """
         Returns the expanded metric evolution based on graph size.
@@ -81,54 +204,81 @@ class Perturbation():
         dict
             The expanded metric evolution.
         """
-        expanded_metrics = self._expand_list_based_on_graph_size(self.metric_evolution)
-        if self.save_nodes:
-            expanded_metrics['node'] = self.node_evolution['node']
-            expanded_metrics['removal_type'] = self.node_evolution['removal_type']
-        return expanded_metrics
+        return self._expand_list_based_on_graph_size(self.metric_evolution)
+
+
+    def get_extinction_record(self) -> dict:
+        """
+        Returns the arrays of the extinction record, or None if `save_nodes` is disabled.
+        The species ids refer to the name table of the graph (Graph.species_names).
+        """
+        return self.extinction_record.to_arrays() if self.save_nodes else None
+
+
+    def get_threshold_sweep(self) -> dict:
+        """
+        Returns the number of species remaining under every threshold of the sweep after every primary removal,
+        or None if no thresholds are set.
+        """
+        return self.threshold_sweep.to_dict() if self.threshold_sweep else None
+
+
+    def get_habitat_metrics(self) -> dict:
+        """
+        Returns the expanded evolution of the habitat metrics, aligned with get_metric_evolution,
+        or None if no habitat tracker is set.
+        """
+        return expand_metric_evolution(self.habitat_tracker.evolution) if self.habitat_tracker else None
 
 
     def _expand_list_based_on_graph_size(self, metric_evolution: dict) -> dict:
         """
-        Expands the metric evolution list based on the graph size. This is useful 
-        for visualizing the evolution over consistent time steps.
-        
-        Parameters:
-        -----------
-        metric_evolution : dict
-            The original metric evolution dictionary.
-        
-        Returns:
-        --------
-        dict
-            The expanded metric evolution.
+        Expands the metric evolution list based on the graph size, see expand_metric_evolution.
+        """
+        return expand_metric_evolution(metric_evolution)
 
-        Example:
-        --------
-        index: [0, 1, 2, ...]
-        {
-            'graph_size' = [100, 97, 96, ...]
-            'avg_degree' = [7, 3, 5, ...]
-        }
-
-        after _expand_list_based_on_graph_size:
-
-        index: [0, 1, 2, 3, 4, ...]
-        {
-            'graph_size' = [100, 100, 100, 97, 96, ...]
-            'avg_degree' = [7, 7, 7, 3, 5, ...]
-        }
-        """
-        graph_size_list = metric_evolution['graph_size']
-        expanded_dict = defaultdict(list)
-        
-        for i in range(len(graph_size_list) - 1):
-            diff = graph_size_list[i] - graph_size_list[i+1] - 1
-            for key, value_list in metric_evolution.items():
-                for _ in range(diff + 1):
-                    expanded_dict[key].append(value_list[i])
 
+def expand_metric_evolution(metric_evolution: dict) -> dict:
+    """
+    Expands the metric evolution list based on the graph size. This is useful 
+    for visualizing the evolution over consistent time steps.
+    
+    Parameters:
+    -----------
+    metric_evolution : dict
+        The original metric evolution dictionary.
+    
+    Returns:
+    --------
+    dict
+        The expanded metric evolution.
+
+    Example:
+    --------
+    index: [0, 1, 2, ...]
+    {
+        'graph_size' = [100, 97, 96, ...]
+        'avg_degree' = [7, 3, 5, ...]
+    }
+
+    after expand_metric_evolution:
+
+    index: [0, 1, 2, 3, 4, ...]
+    {
+        'graph_size' = [100, 100, 100, 97, 96, ...]
+        'avg_degree' = [7, 7, 7, 3, 5, ...]
+    }
+    """
+    graph_size_list = metric_evolution['graph_size']
+    expanded_dict = defaultdict(list)
+    
+    for i in range(len(graph_size_list) - 1):
+        diff = graph_size_list[i] - graph_size_list[i+1] - 1
         for key, value_list in metric_evolution.items():
-            expanded_dict[key].append(value_list[-1])
+            for _ in range(diff + 1):
+                expanded_dict[key].append(value_list[i])
+
+    for key, value_list in metric_evolution.items():
+        expanded_dict[key].append(value_list[-1])
 
-        return expanded_dict
+    return expanded_dict
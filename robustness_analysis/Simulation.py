@@ -1,7 +1,15 @@
-from multiprocessing import Pool, cpu_count
+from multiprocessing import Manager, Pool, cpu_count
 from perturbation import Perturbation
 from graph import Graph
-from file_exporter import export
+from file_exporter import export, export_arrays, export_json, results_directory
+from extinction_record import export_species_names
+from instrumentation import Instrumentation, aggregate, memory_trace
+from progress import ProgressEmitter, ProgressReporter
+from metric_pipeline import MetricPipeline
+from habitat_metrics import HabitatTracker
+from compact_graph import CompactGraph
+import pandas as pd
+import cProfile
 import shutil
 import os
 
@@ -17,9 +25,14 @@ class Simulation():
         List of perturbation instances associated with each graph copy.
     metric_evolution : list
         List of metric evolutions for each perturbation.
+    instrumentation : list
+        List of instrumentation summaries for each perturbation, if instrumentation is enabled.
     """
 
-    def __init__(self, graph: Graph, k: int, save_nodes: bool = False) -> None:
+    def __init__(self, graph: Graph, k: int, save_nodes: bool = False, results_dir: str = 'results',
+                 instrument: bool = False, profile_id: int = None, progress: bool = False, progress_log: str = None,
+                 progress_interval: float = 5.0, thresholds: list = None, pipeline: bool = False,
+                 species_habitats: pd.DataFrame = None) -> None:
         """
         Initializes the Simulation with graph copies and perturbations.
         
@@ -29,9 +42,43 @@ class Simulation():
             The graph on which perturbations will be simulated.
         k : int
             The number of graph copies and perturbations.
+        results_dir : str, optional
+            Directory the perturbation results are written to. Default is 'results'.
+        instrument : bool, optional
+            Whether to record per phase timings, cascade sizes and peak memory of every perturbation. Default is False.
+        profile_id : int, optional
+            Id of a perturbation to run under cProfile and tracemalloc. Default is None.
+        progress : bool, optional
+            Whether workers push progress events to a reporter in the parent process, which prints
+            the aggregate throughput, the ETA and the stragglers. Default is False.
+        progress_log : str, optional
+            Path of a JSON lines file the progress events are appended to. Default is None.
+        progress_interval : float, optional
+            Minimum number of seconds between two progress events of a perturbation. Default is 5.0.
+        thresholds : list, optional
+            Extinction thresholds swept against the removal sequence of every perturbation, exported as
+            threshold_sweep_XXXX. The graph must use the most lenient one. Default is None.
+        pipeline : bool, optional
+            Whether to run the perturbations one after the other in this process, while a pool of metric workers
+            computes the metrics on snapshots of the graph. Uses all cores when k is smaller than cpu_count(),
+            e.g. for a single sequential attack. Default is False.
+        species_habitats : pd.DataFrame, optional
+            Taxon and Habitat columns of the species list. If given, the surviving species, edges and mean degree
+            of every habitat are tracked and exported as habitat_metrics_XXXX. Default is None.
         """
+        self.results_dir = results_dir
+        self.profile_id = None if profile_id is None else "{:04}".format(profile_id)
         self.graphs = self._create_graph_copies(graph, k)
-        self.perturbations = self._create_perturbations(k, save_nodes)
+        self.perturbations = self._create_perturbations(k, save_nodes, instrument, thresholds)
+        if species_habitats is not None:
+            habitat_tracker = HabitatTracker.from_species_df(CompactGraph.from_nx_graph(graph.nx_graph), species_habitats)
+            for perturbation in self.perturbations:
+                perturbation.habitat_tracker = habitat_tracker.copy()
+        self.instrumentation = []
+        self.progress = progress
+        self.progress_log = progress_log
+        self.progress_interval = progress_interval
+        self.pipeline = pipeline
 
 
     def _create_graph_copies(self, graph: Graph, k: int) -> list:
@@ -53,7 +100,7 @@ class Simulation():
         return [graph.copy() for _ in range(k)]
     
 
-    def _create_perturbations(self, k: int, save_nodes: bool) -> list:
+    def _create_perturbations(self, k: int, save_nodes: bool, instrument: bool, thresholds: list = None) -> list:
         """
         Creates k perturbations for the graph copies.
         
@@ -61,13 +108,17 @@ class Simulation():
         -----------
         k : int
             The number of perturbations to create.
+        instrument : bool
+            Whether to attach an Instrumentation to each perturbation.
+        thresholds : list, optional
+            Extinction thresholds of the threshold sweep of each perturbation.
         
         Returns:
         --------
         list
             A list of Perturbation instances.
         """
-        return [Perturbation(i, self.graphs[i], save_nodes) for i in range(k)]
+        return [Perturbation(i, self.graphs[i], save_nodes, Instrumentation() if instrument else None, thresholds=thresholds) for i in range(k)]
     
 
     def run(self) -> None:
@@ -76,18 +127,59 @@ class Simulation():
         """
         print(">>> simulation started")
 
-        remove_results_dir()
+        remove_results_dir(self.results_dir)
+        if self.perturbations and self.perturbations[0].save_nodes:
+            export_species_names(self.graphs[0].species_names, directory=self.results_dir)
 
-        num_processes = cpu_count()
-        
-        with Pool(processes=num_processes) as pool:
-            self.metric_evolution = pool.map(self._run_perturbation, self.perturbations)
+        tasks = [(perturbation, self.results_dir, perturbation.id == self.profile_id) for perturbation in self.perturbations]
+        if self.progress:
+            with Manager() as manager:
+                reporter = self._start_progress_reporter(manager.Queue())
+                results = self._run_tasks(tasks)
+                reporter.stop()
+        else:
+            results = self._run_tasks(tasks)
+
+        self.metric_evolution = [metrics_evolution for metrics_evolution, _ in results]
+        self.instrumentation = [summary for _, summary in results if summary is not None]
+        if self.instrumentation:
+            export_json(aggregate(self.instrumentation), 'instrumentation_summary', directory=self.results_dir)
 
         print(">>> the simulation has successfully concluded, all perturbations are saved in the results directory")
     
 
+    def _run_tasks(self, tasks: list) -> list:
+        """
+        Runs the perturbations in parallel on cpu_count() processes or, in pipeline mode, one after the other
+        with their metrics computed by a shared MetricPipeline.
+        """
+        if not self.pipeline:
+            with Pool(processes=cpu_count()) as pool:
+                return pool.starmap(self._run_perturbation, tasks)
+
+        results = []
+        with MetricPipeline(self.graphs[0]) as metric_pipeline:
+            for perturbation, results_dir, profile in tasks:
+                perturbation.metric_pipeline = metric_pipeline
+                results.append(self._run_perturbation(perturbation, results_dir, profile))
+                perturbation.metric_pipeline = None
+        return results
+
+
+    def _start_progress_reporter(self, event_queue) -> ProgressReporter:
+        """
+        Attaches a ProgressEmitter to every perturbation and starts the reporter consuming their events.
+        """
+        for perturbation in self.perturbations:
+            perturbation.progress = ProgressEmitter(perturbation.id, event_queue, self.progress_interval)
+
+        reporter = ProgressReporter(event_queue, len(self.perturbations), log_path=self.progress_log)
+        reporter.start()
+        return reporter
+
+
     @staticmethod
-    def _run_perturbation(perturbation: Perturbation) -> dict:
+    def _run_perturbation(perturbation: Perturbation, results_dir: str, profile: bool = False) -> tuple:
         """
         Helper method to run a single perturbation.
         
@@ -95,19 +187,58 @@ class Simulation():
         -----------
         perturbation : Perturbation
             The perturbation instance to run.
+        results_dir : str
+            Directory the metric evolution is exported to.
+        profile : bool, optional
+            Whether to run the perturbation under cProfile and tracemalloc. Default is False.
         
         Returns:
         --------
-        dict
-            The metric evolution for the perturbation.
+        tuple
+            The metric evolution and the instrumentation summary (None if disabled) of the perturbation.
         """
-        perturbation.run()
+        if profile:
+            _profile_perturbation(perturbation, results_dir)
+        else:
+            perturbation.run()
+
         metrics_evolution = perturbation.get_metric_evolution()
-        export(metrics_evolution, f'perturbation_{perturbation.id}')
-        return metrics_evolution
+        export(metrics_evolution, f'perturbation_{perturbation.id}', directory=results_dir)
+        if perturbation.save_nodes:
+            export_arrays(perturbation.get_extinction_record(), f'extinctions_{perturbation.id}', directory=results_dir)
+        if perturbation.threshold_sweep:
+            export(perturbation.get_threshold_sweep(), f'threshold_sweep_{perturbation.id}', directory=results_dir)
+        if perturbation.habitat_tracker:
+            export(perturbation.get_habitat_metrics(), f'habitat_metrics_{perturbation.id}', directory=results_dir)
+
+        summary = None
+        if perturbation.instrumentation:
+            summary = perturbation.instrumentation.summary()
+            export_json(summary, f'instrumentation_{perturbation.id}', directory=results_dir)
+
+        return metrics_evolution, summary
+
+
+def _profile_perturbation(perturbation: Perturbation, results_dir: str) -> None:
+    """
+    Runs the perturbation under cProfile and tracemalloc and saves the profile (readable with pstats)
+    and the top allocation sites in the results directory.
+    """
+    profiler = cProfile.Profile()
+    with memory_trace() as memory_report:
+        profiler.runcall(perturbation.run)
+
+    full_directory = results_directory(results_dir)
+    os.makedirs(full_directory, exist_ok=True)
+    profiler.dump_stats(os.path.join(full_directory, f'profile_{perturbation.id}.prof'))
+    with open(os.path.join(full_directory, f'memory_{perturbation.id}.txt'), 'w') as f:
+        f.write("\n".join(memory_report))
     
 
-def remove_results_dir() -> None:
-    directory_path = "results"
+def remove_results_dir(directory_path: str = "results") -> None:
+    """
+    Removes a results directory, resolved like the export functions resolve it (relative to file_exporter).
+    """
+    directory_path = results_directory(directory_path)
     if os.path.exists(directory_path):
         shutil.rmtree(directory_path)
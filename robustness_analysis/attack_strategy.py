@@ -1,8 +1,12 @@
 from abc import ABC, abstractmethod
 import networkx as nx
 import random
+import heapq
+import numpy as np
 import pandas as pd
-from constants import ALL_SPECIES_AND_FOOD_GROUPS
+from constants import ALL_SPECIES_AND_FOOD_GROUPS, THREATENED_SPECIES
+from dominator_tree import DominatorTree, cascade_sizes
+from weighted_sampler import WeightedSampler
 from enum import Enum
 
 
@@ -95,6 +99,7 @@ class Sequential(AttackStrategy):
         BETWEENNESS = nx.betweenness_centrality
         EDGE_BETWEENNESS = nx.edge_betweenness_centrality
         TROPHIC_LEVELS = nx.trophic_levels
+        DOMINATOR_CASCADE = cascade_sizes
 
     def __init__(self, metric: SortBy) -> None:
         self.metric = metric
@@ -117,13 +122,148 @@ class Sequential(AttackStrategy):
         self.sorted_nodes = [node for node in self.sorted_nodes if node not in nodes]
     
 
+
+class GreedyCascade(AttackStrategy):
+    """
+    Represents a greedy worst-case attack strategy on the graph.
+    At each step the node whose removal causes the largest secondary cascade in the current graph is chosen.
+
+    Cascades are evaluated on prey counters over the current graph, without copying it. The candidates are kept
+    in a priority queue of upper bounds (lazy greedy, CELF): only the top of the queue is evaluated exactly, and
+    a node is chosen once its exact cascade in the current graph is at least the bound of every other node.
+
+    Note:
+    - A node only drives extinct species it dominates, so its dominator subtree size minus one bounds its cascade
+      from above (exact without feeding cycles). Nodes outside the reach of the basal species are bounded by the
+      number of such nodes.
+    - The dominator tree is kept up to date with every removal (DominatorTree.remove). The cascade of a node
+      cannot grow while its dominator subtree is unchanged, so stale bounds and stale exact cascades stay in the
+      queue, and only the nodes whose subtree changed get a new bound, their current subtree size.
+    - Cascades follow the default extinction threshold of the graph (a consumer loses all its prey), other
+      thresholds are rejected.
+    """
+
+    def __init__(self) -> None:
+        self.tree = None
+        self.queue = []
+        self.entries = {}
+        self.removed = set()
+        self.unreachable = 0
+        self.step = 0
+
+
+    def setup_attack_strategy(self, nx_graph: nx.DiGraph) -> None:
+        if nx_graph.graph.get('extinction_threshold', 1.0) != 1.0:
+            raise ValueError("GreedyCascade only supports the default extinction threshold of 1.0")
+        self.tree = DominatorTree.from_nx_graph(nx_graph)
+        # Entries are (-bound, -step of the evaluation, species id), exact bounds come first among ties.
+        # Dominator bounds get step -1, only the entry matching self.entries of a species is valid.
+        self.queue = []
+        self.entries = {}
+        self.removed = set()
+        self.unreachable = -1
+        self._push_bounds(np.flatnonzero(self.tree.alive))
+
+
+    def choose_node(self, nx_graph: nx.DiGraph) -> str:
+        """
+        Chooses the node with the largest secondary cascade in the given graph.
+
+        Parameters:
+        -----------
+        nx_graph : nx.DiGraph
+            The current directed graph.
+
+        Returns:
+        --------
+        str
+            The chosen node.
+        """
+        names = self.tree.graph.names
+        removed = [species for species in self.removed if names[species] not in nx_graph]
+        self.removed = set()
+        if removed:
+            for species in removed:
+                del self.entries[species]
+            self._push_bounds(self.tree.remove(removed))
+
+        while self.queue:
+            negative_bound, negative_step, species = self.queue[0]
+            if self.entries.get(species) != (-negative_bound, -negative_step):
+                heapq.heappop(self.queue)  # removed node or superseded bound
+                continue
+            if -negative_step == self.step:
+                break  # exact in the current graph and at least every other bound
+            heapq.heappop(self.queue)
+            self._evaluate(nx_graph, species)
+
+        species = self.queue[0][2]  # stays in the queue until it is removed from the graph
+        self.removed.add(species)
+        self.step += 1
+        return names[species]
+
+
+    def notify_nodes(self, nodes: set) -> None:
+        """
+        Records the secondary removals, taken out of the dominator tree at the next step.
+        """
+        index = self.tree.graph.index
+        self.removed.update(index[node] for node in nodes)
+
+
+    def _push_bounds(self, species: np.ndarray) -> None:
+        """
+        Pushes the dominator bounds of the given species, and of all unreachable species if their number changed.
+        """
+        unreachable = self.tree.alive & (self.tree.idom == DominatorTree.UNREACHABLE)
+        count = int(unreachable.sum())
+        if count != self.unreachable:
+            self.unreachable = count
+            species = np.union1d(species, np.flatnonzero(unreachable))
+
+        # Species outside the reach of the basal species can only drive each other extinct
+        bounds = np.where(unreachable[species], count - 1, self.tree.cascade_sizes[species])
+        for node, bound in zip(species.tolist(), bounds.tolist()):
+            self.entries[node] = (bound, -1)
+            heapq.heappush(self.queue, (-bound, 1, node))
+
+
+    def _evaluate(self, nx_graph: nx.DiGraph, species: int) -> None:
+        size = len(self._cascade(nx_graph, self.tree.graph.names[species])) - 1
+        self.entries[species] = (size, self.step)
+        heapq.heappush(self.queue, (-size, -self.step, species))
+
+
+    @staticmethod
+    def _cascade(nx_graph: nx.DiGraph, node: str) -> set:
+        """
+        Returns the node and the nodes which would go extinct with it, following the cascade rule of
+        Graph.remove_node_and_dependents (a node goes extinct once it has no prey left besides itself).
+        """
+        successors, predecessors = nx_graph._succ, nx_graph._pred  # plain adjacency dicts, this is the hot loop
+        dead = {node}
+        lost = {}
+        stack = [node]
+        while stack:
+            for consumer in successors[stack.pop()]:
+                if consumer in dead:
+                    continue
+                count = lost.get(consumer, 0) + 1
+                if count == len(predecessors[consumer]) - (consumer in predecessors[consumer]):
+                    dead.add(consumer)
+                    stack.append(consumer)
+                else:
+                    lost[consumer] = count
+        return dead
+
+
 class ThreatenedHabitats(AttackStrategy):
     """
     Represents an attack strategy based on threatened habitats.
     Nodes (species) residing in threatened habitats are chosen based on their respective probabilities.
     """
 
-    def __init__(self, threatened_habitats: list, min_probability: int = 0.05):
+    def __init__(self, threatened_habitats: list, min_probability: int = 0.05, species_df: pd.DataFrame = None):
         """
         Initializes the ThreatenedHabitats attack strategy.
 
@@ -133,15 +273,21 @@ class ThreatenedHabitats(AttackStrategy):
             List of habitats that are considered threatened.
         min_probability : int, optional
             Minimum probability for a habitat to be chosen. Default is 0.05.
+        species_df : pd.DataFrame, optional
+            Taxon and Habitat columns of the species list, read from ALL_SPECIES_AND_FOOD_GROUPS if not given.
         """
         self.threatened_habitats = threatened_habitats
         self.min_probability = min_probability
+        self.species_df = species_df
         self.buckets = {}
+        self.node_buckets = {}
         
 
     def setup_attack_strategy(self, nx_graph: nx.DiGraph) -> dict:
 
-        species_df = pd.read_csv(ALL_SPECIES_AND_FOOD_GROUPS, usecols=['Taxon', 'Habitat'])
+        species_df = self.species_df
+        if species_df is None:
+            species_df = pd.read_csv(ALL_SPECIES_AND_FOOD_GROUPS, usecols=['Taxon', 'Habitat'])
         self._set_habitats(nx_graph, species_df)
 
         # Step 1: Attach proportion to nodes and add to proportion to set of proportions
@@ -151,7 +297,7 @@ class ThreatenedHabitats(AttackStrategy):
             
             threatened_count = sum(1 for habitat in habitats if habitat in self.threatened_habitats)
             proportion = threatened_count / len(habitats) if habitats else 0.0
-            nx_graph.nodes[node]["Bucket"] = str(proportion)
+            self.node_buckets[node] = str(proportion)
 
             proportions.add(proportion)
 
@@ -179,19 +325,20 @@ class ThreatenedHabitats(AttackStrategy):
         self.buckets = buckets
 
 
-    def _set_habitats(self, nx_graph: nx.DiGraph, species_df: pd.DataFrame) -> None:
+    @staticmethod
+    def _set_habitats(nx_graph: nx.DiGraph, species_df: pd.DataFrame) -> None:
 
         for _, row in species_df.iterrows():
             specie = row['Taxon']
             habitat_list = row['Habitat'].split(";")
             
-            if specie in list(nx_graph.nodes).copy():
+            if specie in nx_graph:
                 nx_graph.nodes[specie]['Habitat'] = habitat_list
 
 
     def choose_node(self, nx_graph: nx.DiGraph) -> str:
         chosen_bucket = self._choose_bucket()
-        eligible_nodes = [node for node, data in nx_graph.nodes(data=True) if data.get('Bucket') == chosen_bucket]
+        eligible_nodes = [node for node in nx_graph if self.node_buckets.get(node) == chosen_bucket]
         
         if not eligible_nodes:
             print(f"No nodes found for bucket {chosen_bucket}. Removing bucket.")
@@ -202,7 +349,7 @@ class ThreatenedHabitats(AttackStrategy):
             for key in self.buckets:
                 self.buckets[key] /= total_probability
 
-            return self.choose_node()  # Recursively choose another node
+            return self.choose_node(nx_graph)  # Recursively choose another node
         return random.choice(eligible_nodes)
     
     
@@ -212,14 +359,115 @@ class ThreatenedHabitats(AttackStrategy):
         return random.choices(buckets, weights=probabilities)[0]
 
 
-class ThreatenedSpecies(AttackStrategy):
+class WeightedAttack(AttackStrategy):
+    """
+    Represents an attack strategy based on per-species weights.
+    Nodes are chosen at random with probability proportional to their weight, without replacement.
 
-    def __init__(self, threatened_species: list = None):
-        self.threatened_species = threatened_species
+    The weights are kept in a WeightedSampler, so that choosing a node and taking out the secondary
+    removals notified by the graph cost O(log n) each.
+    """
 
+    def __init__(self, weights: dict, default_weight: float = 0.0) -> None:
+        """
+        Initializes the WeightedAttack strategy.
+
+        Parameters:
+        -----------
+        weights : dict
+            Non-negative removal weight of every species.
+        default_weight : float, optional
+            Weight of the species missing from weights. Default is 0.0.
+
+        Note:
+        - Species with weight 0 are only chosen once all weighted species are removed, uniformly at random.
+        """
+        self.weights = weights
+        self.default_weight = default_weight
+        self.nodes = []
+        self.index = {}
+        self.sampler = None
+
+
+    @classmethod
+    def from_column(cls, species_df: pd.DataFrame, column: str, taxon_column: str = 'Taxon', default_weight: float = 0.0) -> 'WeightedAttack':
+        """
+        Creates the strategy from a weight column of a species table, e.g. a threat score per Taxon.
+        """
+        return cls(dict(zip(species_df[taxon_column], species_df[column])), default_weight)
+
+
+    def setup_attack_strategy(self, nx_graph: nx.DiGraph) -> None:
+        self.nodes = list(nx_graph.nodes)
+        self.index = {node: i for i, node in enumerate(self.nodes)}
+        self.sampler = WeightedSampler([self.weights.get(node, self.default_weight) for node in self.nodes])
 
-    def setup_attack_strategy(self, nx_graph: nx.DiGraph) -> dict:
-        pass
 
     def choose_node(self, nx_graph: nx.DiGraph) -> str:
-        pass
\ No newline at end of file
+        """
+        Chooses a node with probability proportional to its weight.
+
+        Parameters:
+        -----------
+        nx_graph : nx.DiGraph
+            The directed graph from which a node is to be chosen.
+
+        Returns:
+        --------
+        str
+            The chosen node.
+        """
+        if not self.sampler:
+            return random.choice(list(nx_graph.nodes()))  # only species without weight are left
+        return self.nodes[self.sampler.pop()]
+
+
+    def notify_nodes(self, nodes: set) -> None:
+        """
+        Takes out secondary removals from the sampler.
+        """
+        for node in nodes:
+            self.sampler.remove(self.index[node])
+
+
+class ThreatenedSpecies(WeightedAttack):
+    """
+    Represents an attack strategy based on threatened species.
+    Nodes (species) are chosen with probabilities weighted by their Red List category.
+    """
+
+    # Extinction probabilities within 100 years of the IUCN categories (Mooers et al., 2008)
+    RED_LIST_WEIGHTS = {'CR': 0.999, 'EN': 0.667, 'VU': 0.1, 'NT': 0.01, 'LC': 0.0001}
+
+    def __init__(self, threatened_species: pd.DataFrame = None, category_weights: dict = None,
+                 category_column: str = 'Category', default_weight: float = 0.0001) -> None:
+        """
+        Initializes the ThreatenedSpecies attack strategy.
+
+        Parameters:
+        -----------
+        threatened_species : pd.DataFrame, optional
+            Taxon and category column of the threatened species, read from THREATENED_SPECIES if not given.
+        category_weights : dict, optional
+            Weight of every category. Default is RED_LIST_WEIGHTS.
+        category_column : str, optional
+            Name of the category column. Default is 'Category'.
+        default_weight : float, optional
+            Weight of the species which are not listed or have an unknown category (e.g. DD), by default
+            the one of least concern species.
+        """
+        super().__init__({}, default_weight)
+        self.threatened_species = threatened_species
+        self.category_weights = category_weights or self.RED_LIST_WEIGHTS
+        self.category_column = category_column
+
+
+    def setup_attack_strategy(self, nx_graph: nx.DiGraph) -> None:
+        threatened_species = self.threatened_species
+        if threatened_species is None:
+            threatened_species = pd.read_csv(THREATENED_SPECIES, usecols=['Taxon', self.category_column])
+
+        categories = threatened_species[self.category_column].str.strip()
+        self.weights = {taxon: self.category_weights[category]
+                        for taxon, category in zip(threatened_species['Taxon'], categories) if category in self.category_weights}
+        super().setup_attack_strategy(nx_graph)
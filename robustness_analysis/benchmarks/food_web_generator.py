@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+from enum import Enum
+
+
+class FoodWebModel(Enum):
+    """
+    Stores the structural models that can be used to generate synthetic food webs.
+    """
+
+    NICHE = "NICHE"
+    CASCADE = "CASCADE"
+
+
+def generate_food_web(model: FoodWebModel, n_species: int, links_per_species: float = 34.0, seed: int = None) -> tuple:
+    """
+    Generates a synthetic food web with the given structural model.
+
+    The links are returned as integer arrays where each entry (consumer[i], resource[i]) is a
+    feeding link. The default number of links per species matches the Swiss metaweb.
+
+    Parameters:
+    -----------
+    model : FoodWebModel
+        The structural model used to generate the links.
+    n_species : int
+        Number of species in the generated web.
+    links_per_species : float, optional
+        Expected number of links per species (L/S). Default is 34.0.
+    seed : int, optional
+        Seed of the random number generator.
+
+    Returns:
+    --------
+    tuple
+        The consumer and resource arrays of the generated links.
+    """
+    rng = np.random.default_rng(seed)
+    connectance = links_per_species / n_species
+
+    if model == FoodWebModel.NICHE:
+        return _niche_model(rng, n_species, connectance)
+    elif model == FoodWebModel.CASCADE:
+        return _cascade_model(rng, n_species, connectance)
+    raise ValueError(f"Unknown food web model: {model}")
+
+
+def _niche_model(rng: np.random.Generator, n_species: int, connectance: float) -> tuple:
+    """
+    Niche model (Williams & Martinez, 2000): every species has a niche value n_i and feeds on
+    all species whose niche value falls in a range of width r_i centered at c_i.
+    """
+    if connectance >= 0.5:
+        raise ValueError("The niche model requires a connectance below 0.5")
+
+    beta = 1 / (2 * connectance) - 1
+    niche = rng.random(n_species)
+    ranges = niche * rng.beta(1, beta, n_species)
+    ranges[np.argmin(niche)] = 0  # the species with the smallest niche value is basal
+    centers = rng.uniform(ranges / 2, niche)
+
+    order = np.argsort(niche)
+    sorted_niche = niche[order]
+    low = np.searchsorted(sorted_niche, centers - ranges / 2, side='left')
+    high = np.searchsorted(sorted_niche, centers + ranges / 2, side='right')
+    counts = high - low
+
+    # Expand the [low, high) intervals of every consumer into one array of positions
+    consumers = np.repeat(np.arange(n_species), counts)
+    starts = np.repeat(low - (np.cumsum(counts) - counts), counts)
+    resources = order[starts + np.arange(counts.sum())]
+
+    return consumers, resources
+
+
+def _cascade_model(rng: np.random.Generator, n_species: int, connectance: float) -> tuple:
+    """
+    Cascade model (Cohen & Newman, 1985): species are ranked and each species feeds on every
+    lower ranked species with probability p = 2CS / (S - 1).
+    """
+    n_pairs = n_species * (n_species - 1) // 2
+    probability = min(1.0, 2 * connectance * n_species / (n_species - 1))
+    n_links = rng.binomial(n_pairs, probability)
+
+    # Sample distinct linear pair indices and map them back to (consumer, resource) with resource < consumer
+    pairs = np.sort(rng.choice(n_pairs, size=n_links, replace=False)).astype(np.int64)
+    consumers = np.floor((1 + np.sqrt(1 + 8 * pairs.astype(np.float64))) / 2).astype(np.int64)
+    consumers -= (consumers * (consumers - 1) // 2 > pairs)  # correct rounding errors of sqrt
+    consumers += ((consumers + 1) * consumers // 2 <= pairs)
+    resources = pairs - consumers * (consumers - 1) // 2
+
+    return consumers, resources
+
+
+def species_names(n_species: int, taxa: list = None) -> np.ndarray:
+    """
+    Returns a name for every generated species. If taxa are given, they are used for the first
+    species so that node attributes (e.g. habitats) can be joined on the generated web.
+    """
+    names = np.char.add("species_", np.arange(n_species).astype(str)).astype(object)
+    if taxa is not None:
+        n_taxa = min(n_species, len(taxa))
+        names[:n_taxa] = taxa[:n_taxa]
+    return names
+
+
+def to_edge_df(consumers: np.ndarray, resources: np.ndarray, names: np.ndarray, source: str, target: str) -> pd.DataFrame:
+    """
+    Formats generated links like the metaweb csv files: the consumer is the source of a link
+    and the resource its target.
+    """
+    return pd.DataFrame({source: names[consumers], target: names[resources]})
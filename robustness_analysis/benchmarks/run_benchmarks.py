@@ -0,0 +1,269 @@
+import sys
+sys.path.append('../')
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from graph import Graph
+from metaweb import MetawebProcessor
+from metric_calculator import MetricCalculator
+from attack_strategy import Random, Sequential, ThreatenedHabitats, GreedyCascade, WeightedAttack
+from simulation import Simulation
+from food_web_generator import FoodWebModel, generate_food_web, species_names, to_edge_df
+import constants
+
+"""
+Benchmark suite running on synthetic food webs, so that performance can be measured without the metaweb csv files.
+
+Example:
+    python run_benchmarks.py --sizes 1000 10000 --models NICHE
+    python run_benchmarks.py --sizes 100000 1000000 --large --removals 20
+    python run_benchmarks.py --compare results/benchmark_old.json results/benchmark_new.json
+"""
+
+BENCHMARK_RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+
+STRATEGIES = {
+    'random': lambda: Random(),
+    'sequential_degree': lambda: Sequential(metric=Sequential.SortBy.DEGREE),
+    'sequential_dominator_cascade': lambda: Sequential(metric=Sequential.SortBy.DOMINATOR_CASCADE),
+    'threatened_habitats': lambda: ThreatenedHabitats(['Forest']),
+    'greedy_cascade': lambda: GreedyCascade(),
+    'weighted': lambda: WeightedAttack({}, default_weight=1.0),
+}
+
+# Webs above this size take minutes and gigabytes per graph copy and must be requested with --large
+MAX_DEFAULT_SPECIES = 10**4
+
+
+class Benchmark:
+    """
+    Times the main operations of the robustness analysis on synthetic food webs and collects
+    the timings as machine-readable records.
+    """
+
+    def __init__(self, repeat: int, removals: int, k: int, max_processor_species: int, max_simulation_species: int,
+                 generate_links: bool = False) -> None:
+        self.repeat = repeat
+        self.removals = removals
+        self.k = k
+        self.max_processor_species = max_processor_species
+        self.max_simulation_species = max_simulation_species
+        self.generate_links = generate_links
+        self.records = []
+        self.taxa = pd.read_csv(constants.ALL_SPECIES_AND_FOOD_GROUPS, usecols=['Taxon'])['Taxon'].unique()
+
+
+    def run(self, models: list, sizes: list, links_per_species: float, seed: int) -> list:
+        for model in models:
+            for n_species in sizes:
+                print(f">>> benchmarking {model.value} model with {n_species} species")
+                self._run_web(model, n_species, links_per_species, seed)
+
+        self._time_metaweb_processor_setup()
+        return self.records
+
+
+    def _run_web(self, model: FoodWebModel, n_species: int, links_per_species: float, seed: int) -> None:
+        context = {'model': model.value, 'n_species': n_species}
+
+        start = time.perf_counter()
+        consumers, resources = generate_food_web(model, n_species, links_per_species, seed)
+        names = species_names(n_species, self.taxa)
+        edge_df = to_edge_df(consumers, resources, names, constants.SOURCE_COL, constants.TARGET_COL)
+        self._record('generate_food_web', context, [time.perf_counter() - start])
+        context['n_edges'] = len(edge_df)
+
+        start = time.perf_counter()
+        graph = Graph(Random(), edge_df, source=constants.SOURCE_COL, target=constants.TARGET_COL)
+        self._record('graph_build', context, [time.perf_counter() - start])
+
+        calculator = MetricCalculator()
+        self._record('compute_metrics', context, self._time_calls(lambda: calculator.compute_metrics(graph.nx_graph), self.repeat))
+
+        for name, create_strategy in STRATEGIES.items():
+            self._time_attack_strategy(name, create_strategy, graph, context)
+
+        self._time_node_removal(graph, context, seed)
+
+        if n_species <= self.max_processor_species:
+            self._time_remove_random_links(edge_df, context)
+
+        if n_species <= self.max_simulation_species:
+            self._time_simulation(graph, context)
+
+
+    def _time_attack_strategy(self, name: str, create_strategy, graph: Graph, context: dict) -> None:
+        strategy = create_strategy()
+        nx_graph = graph.nx_graph.copy()
+
+        start = time.perf_counter()
+        strategy.setup_attack_strategy(nx_graph)
+        self._record(f'setup_attack_strategy[{name}]', context, [time.perf_counter() - start])
+
+        self._record(f'choose_node[{name}]', context, self._time_calls(lambda: strategy.choose_node(nx_graph), self.repeat))
+
+
+    def _time_node_removal(self, graph: Graph, context: dict, seed: int) -> None:
+        """
+        Times remove_node_and_dependents on a copy of the graph for a fixed sequence of random primary removals.
+        """
+        graph_copy = graph.copy()
+        nodes = list(graph_copy.nx_graph.nodes)
+        random.Random(seed).shuffle(nodes)
+
+        timings = []
+        cascade_sizes = []
+        for node in nodes:
+            if len(timings) == self.removals:
+                break
+            if node not in graph_copy.nx_graph:
+                continue
+            start = time.perf_counter()
+            dependents = graph_copy.remove_node_and_dependents(node)
+            timings.append(time.perf_counter() - start)
+            cascade_sizes.append(len(dependents))
+
+        self._record('remove_node_and_dependents', context, timings, mean_cascade_size=float(np.mean(cascade_sizes)))
+
+
+    def _time_remove_random_links(self, edge_df, context: dict) -> None:
+        processor = MetawebProcessor.__new__(MetawebProcessor)  # remove_random_links does not use the node lists
+        self._record('remove_random_links', context, self._time_calls(lambda: processor.remove_random_links(edge_df), 1))
+
+
+    def _time_metaweb_processor_setup(self) -> None:
+        """
+        Times the preprocessing on the shipped node lists, which does not depend on the size of the web.
+        generate_links takes minutes and is only timed if requested.
+        """
+        print(">>> benchmarking metaweb processor")
+        start = time.perf_counter()
+        processor = MetawebProcessor(constants.ALL_SPECIES_AND_FOOD_GROUPS, constants.SPECIES_FOR_RANDOMIZED_LINKS)
+        self._record('metaweb_processor_init', {}, [time.perf_counter() - start])
+        if self.generate_links:
+            self._record('generate_links', {}, self._time_calls(processor.generate_links, 1))
+
+
+    def _time_simulation(self, graph: Graph, context: dict) -> None:
+        results_dir = tempfile.mkdtemp(prefix='benchmark_results_')
+        simulation = Simulation(graph, k=self.k, results_dir=results_dir)
+        start = time.perf_counter()
+        simulation.run()
+        self._record('simulation_run', dict(context, k=self.k), [time.perf_counter() - start])
+        remove_dir(results_dir)
+
+
+    @staticmethod
+    def _time_calls(function, repeat: int) -> list:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - start)
+        return timings
+
+
+    def _record(self, benchmark: str, context: dict, timings: list, **extra) -> None:
+        record = {
+            'benchmark': benchmark,
+            **context,
+            'calls': len(timings),
+            'mean_s': float(np.mean(timings)),
+            'median_s': float(np.median(timings)),
+            'min_s': float(np.min(timings)),
+            'total_s': float(np.sum(timings)),
+            **extra
+        }
+        print(f"    {benchmark}: median {record['median_s']:.6f}s over {record['calls']} calls")
+        self.records.append(record)
+
+
+def remove_dir(directory: str) -> None:
+    for filename in os.listdir(directory):
+        os.remove(os.path.join(directory, filename))
+    os.rmdir(directory)
+
+
+def environment_info() -> dict:
+    try:
+        revision = subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)), text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = None
+
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_revision': revision,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def record_key(record: dict) -> tuple:
+    return (record['benchmark'], record.get('model'), record.get('n_species'))
+
+
+def compare(baseline_path: str, candidate_path: str) -> None:
+    """
+    Prints the ratio between the median timings of two benchmark result files.
+    Ratios above 1 mean that the candidate is slower than the baseline.
+    """
+    with open(baseline_path) as f:
+        baseline = {record_key(record): record for record in json.load(f)['results']}
+    with open(candidate_path) as f:
+        candidate = {record_key(record): record for record in json.load(f)['results']}
+
+    print(f"{'benchmark':45} {'model':8} {'species':>9} {'baseline_s':>12} {'candidate_s':>12} {'ratio':>7}")
+    for key in sorted(baseline.keys() & candidate.keys(), key=str):
+        before, after = baseline[key]['median_s'], candidate[key]['median_s']
+        ratio = after / before if before > 0 else float('inf')
+        benchmark, model, n_species = key
+        print(f"{benchmark:45} {model or '-':8} {n_species or '-':>9} {before:12.6f} {after:12.6f} {ratio:7.2f}")
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Benchmark the robustness analysis on synthetic food webs.")
+    parser.add_argument('--models', nargs='+', default=[model.value for model in FoodWebModel], choices=[model.value for model in FoodWebModel])
+    parser.add_argument('--sizes', nargs='+', type=int, default=[10**3, 10**4])
+    parser.add_argument('--large', action='store_true', help=f"allow sizes above {MAX_DEFAULT_SPECIES} species")
+    parser.add_argument('--links-per-species', type=float, default=34.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=5, help="number of timed calls for repeatable operations")
+    parser.add_argument('--removals', type=int, default=100, help="number of timed primary removals")
+    parser.add_argument('--k', type=int, default=2, help="number of perturbations in the end-to-end simulation")
+    parser.add_argument('--max-processor-species', type=int, default=10**3, help="largest web used for remove_random_links")
+    parser.add_argument('--max-simulation-species', type=int, default=10**3, help="largest web used for the end-to-end simulation")
+    parser.add_argument('--generate-links', action='store_true', help="also time MetawebProcessor.generate_links (minutes)")
+    parser.add_argument('--output', default=None, help="path of the json results file")
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CANDIDATE'), help="compare two results files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        sys.exit()
+
+    too_large = [n_species for n_species in args.sizes if n_species > MAX_DEFAULT_SPECIES]
+    if too_large and not args.large:
+        parser.error(f"sizes {too_large} are above {MAX_DEFAULT_SPECIES} species, pass --large to run them")
+
+    benchmark = Benchmark(args.repeat, args.removals, args.k, args.max_processor_species, args.max_simulation_species, args.generate_links)
+    records = benchmark.run([FoodWebModel(model) for model in args.models], args.sizes, args.links_per_species, args.seed)
+
+    output = args.output or os.path.join(BENCHMARK_RESULTS_DIR, f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({'environment': environment_info(), 'parameters': vars(args), 'results': records}, f, indent=2)
+
+    print(">>> benchmark results saved to", output)
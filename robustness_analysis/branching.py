@@ -0,0 +1,80 @@
+from multiprocessing import Pool, cpu_count
+from perturbation import Perturbation
+from snapshot import PerturbationSnapshot
+from attack_strategy import AttackStrategy
+from file_exporter import export, export_arrays, export_json
+from extinction_record import export_species_names
+from simulation import remove_results_dir
+from worker_state import init_worker, worker_state, seed_random
+import networkx as nx
+
+
+class BranchingSimulation:
+    """
+    Forks k continuations from the snapshot of a perturbation prefix, e.g. the first steps of a degree attack
+    followed by random losses. The graph of the snapshot is restored and its attack strategy set up once, and
+    handed to every worker of the pool at start, so that continuations only copy it instead of replaying the prefix.
+
+    Example:
+        prefix = Perturbation(0, graph.copy(), save_nodes=True)
+        prefix.run(until_step=200)
+        BranchingSimulation(graph.nx_graph, prefix.snapshot(), k=1000, attack_strategy=Random()).run()
+
+    The exported metric evolutions and extinction records contain the prefix followed by the continuation.
+    """
+
+    def __init__(self, base_nx_graph: nx.DiGraph, snapshot: PerturbationSnapshot, k: int, attack_strategy: AttackStrategy = None,
+                 results_dir: str = 'results', processes: int = None, seed: int = 0) -> None:
+        """
+        Parameters:
+        -----------
+        base_nx_graph : nx.DiGraph
+            The initial (reversed) NetworkX graph of the prefix.
+        snapshot : PerturbationSnapshot
+            State of the prefix.
+        k : int
+            Number of continuations.
+        attack_strategy : AttackStrategy, optional
+            Attack strategy of the continuations. Default is None, continuing with the strategy of the prefix.
+        results_dir : str, optional
+            Directory the continuations are written to. Default is 'results'.
+        processes : int, optional
+            Number of worker processes. Default is cpu_count().
+        seed : int, optional
+            Seed of the first continuation, continuation i uses seed + i. Default is 0.
+        """
+        self.snapshot = snapshot
+        self.graph = snapshot.restore_graph(base_nx_graph, attack_strategy)
+        self.k = k
+        self.results_dir = results_dir
+        self.processes = processes or cpu_count()
+        self.seed = seed
+
+
+    def run(self) -> None:
+        print(">>> branching simulation started with", self.k, "continuations from step", self.snapshot.step)
+
+        remove_results_dir(self.results_dir)
+        export_json({'k': self.k, 'prefix_steps': self.snapshot.step, 'seed': self.seed}, 'branching', directory=self.results_dir)
+        if self.snapshot.extinction_record is not None:
+            export_species_names(self.graph.species_names, directory=self.results_dir)
+
+        with Pool(processes=self.processes, initializer=init_worker,
+                  initargs=(dict(snapshot=self.snapshot, graph=self.graph, results_dir=self.results_dir, seed=self.seed),)) as pool:
+            for count, perturbation_id in enumerate(pool.imap_unordered(_run_continuation, range(self.k)), start=1):
+                print(f">>> {count}/{self.k} continuations done ({perturbation_id})")
+
+        print(">>> the branching simulation has successfully concluded, all continuations are saved in the results directory")
+
+
+def _run_continuation(perturbation_id: int) -> str:
+    state = worker_state()
+    seed_random(state['seed'] + perturbation_id)
+
+    perturbation = Perturbation.from_snapshot(perturbation_id, state['snapshot'], state['graph'].copy())
+    perturbation.run()
+
+    export(perturbation.get_metric_evolution(), f'perturbation_{perturbation.id}', directory=state['results_dir'])
+    if perturbation.save_nodes:
+        export_arrays(perturbation.get_extinction_record(), f'extinctions_{perturbation.id}', directory=state['results_dir'])
+    return perturbation.id
@@ -0,0 +1,141 @@
+import networkx as nx
+import numpy as np
+import pandas as pd
+
+
+class CompactGraph:
+    """
+    Integer indexed, read-only representation of a food web. Species are identified by their position
+    in the name table and links are stored as compressed adjacency arrays in both directions.
+
+    Links follow the orientation of Graph.nx_graph: an edge goes from a resource (prey) to its consumer.
+
+    Attributes:
+    -----------
+    names : np.ndarray
+        Name of every species, indexed by species id.
+    index : dict
+        Species id of every name.
+    resources : np.ndarray
+        Resource id of every link, links are sorted by consumer.
+    consumers : np.ndarray
+        Consumer id of every link, links are sorted by consumer.
+    self_loop : np.ndarray
+        Whether a species feeds on itself (cannibalism).
+    prey_count : np.ndarray
+        Number of prey of every species, not counting itself. A species goes extinct in a cascade once
+        all of these are gone.
+    """
+
+    def __init__(self, names: np.ndarray, consumers: np.ndarray, resources: np.ndarray) -> None:
+        """
+        Parameters:
+        -----------
+        names : np.ndarray
+            Name table, indexed by species id.
+        consumers : np.ndarray
+            Consumer id of every link.
+        resources : np.ndarray
+            Resource id of every link. Duplicate links are dropped.
+        """
+        self.names = np.asarray(names, dtype=object)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        n = len(self.names)
+
+        links = np.unique(np.asarray(consumers, dtype=np.int64) * n + np.asarray(resources, dtype=np.int64))
+        self.consumers = (links // n).astype(np.int32)
+        self.resources = (links % n).astype(np.int32)
+
+        is_loop = self.consumers == self.resources
+        self.self_loop = np.zeros(n, dtype=bool)
+        self.self_loop[self.consumers[is_loop]] = True
+        self.prey_count = np.bincount(self.consumers[~is_loop], minlength=n).astype(np.int32)
+
+        # Links sorted by consumer give the prey of every species, links sorted by resource its consumers
+        self.prey_ptr = np.concatenate([[0], np.cumsum(np.bincount(self.consumers, minlength=n))])
+        order = np.argsort(self.resources, kind='stable')
+        self.consumer_idx = self.consumers[order]
+        self.consumer_ptr = np.concatenate([[0], np.cumsum(np.bincount(self.resources, minlength=n))])
+
+
+    @classmethod
+    def from_edge_df(cls, edge_df: pd.DataFrame, source: str, target: str) -> 'CompactGraph':
+        """
+        Creates a CompactGraph from a metaweb edge list, whose source column holds the consumers
+        and target column the resources.
+        """
+        codes, names = pd.factorize(pd.concat([edge_df[source], edge_df[target]], ignore_index=True))
+        return cls(names, codes[:len(edge_df)], codes[len(edge_df):])
+
+
+    @classmethod
+    def from_nx_graph(cls, nx_graph: nx.DiGraph) -> 'CompactGraph':
+        """
+        Creates a CompactGraph from the (reversed) NetworkX graph of a Graph.
+        Species keep the order of the NetworkX nodes.
+        """
+        names = np.array(list(nx_graph.nodes), dtype=object)
+        index = {name: i for i, name in enumerate(names)}
+        edges = np.array([(index[resource], index[consumer]) for resource, consumer in nx_graph.edges], dtype=np.int64).reshape(-1, 2)
+        return cls(names, edges[:, 1], edges[:, 0])
+
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+    def number_of_links(self) -> int:
+        return len(self.consumers)
+
+
+    def prey(self, species: int) -> np.ndarray:
+        return self.resources[self.prey_ptr[species]:self.prey_ptr[species + 1]]
+
+
+    def consumers_of(self, species: int) -> np.ndarray:
+        return self.consumer_idx[self.consumer_ptr[species]:self.consumer_ptr[species + 1]]
+
+
+    def prey_links(self, species: np.ndarray) -> tuple:
+        """
+        Returns the links of several species to their prey at once, as arrays of (consumer, prey) ids.
+        """
+        return _gather(self.prey_ptr, self.resources, np.asarray(species))
+
+
+    def consumer_links(self, species: np.ndarray) -> tuple:
+        """
+        Returns the links of several species to their consumers at once, as arrays of (resource, consumer) ids.
+        """
+        return _gather(self.consumer_ptr, self.consumer_idx, np.asarray(species))
+
+
+    def basal(self) -> np.ndarray:
+        """
+        Returns the ids of the species without prey.
+        """
+        return np.flatnonzero(self.prey_count == 0)
+
+
+    def to_edge_df(self, source: str, target: str) -> pd.DataFrame:
+        return pd.DataFrame({source: self.names[self.consumers], target: self.names[self.resources]})
+
+
+    def to_nx_graph(self) -> nx.DiGraph:
+        """
+        Returns the NetworkX graph in the orientation used by Graph, with edges from resources to consumers.
+        """
+        nx_graph = nx.DiGraph()
+        nx_graph.add_nodes_from(self.names)
+        nx_graph.add_edges_from(zip(self.names[self.resources], self.names[self.consumers]))
+        return nx_graph
+
+
+def _gather(ptr: np.ndarray, values: np.ndarray, species: np.ndarray) -> tuple:
+    """
+    Concatenates the adjacency slices of the given species without a Python loop.
+    """
+    starts = ptr[species]
+    counts = ptr[species + 1] - starts
+    offsets = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+    return np.repeat(species, counts), values[offsets]
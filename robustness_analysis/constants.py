@@ -7,6 +7,7 @@ FOODWEB_02 = '../../data/foodwebs/02_metaweb_unrestrained.csv'
 FOODWEB_03 = '../../data/foodwebs/03_metaweb_restrained_conservative.csv'
 ALL_SPECIES_AND_FOOD_GROUPS = '../../data/node_lists/all_species_and_feeding_groups.csv'
 SPECIES_FOR_RANDOMIZED_LINKS = '../../data/node_lists/species_for_randomized_links.csv'
+THREATENED_SPECIES = '../../data/node_lists/threatened_species.csv'  # Taxon and Red List Category columns
 
 SOURCE_COL = "Source_Name"
 TARGET_COL = "Target_Name"
@@ -0,0 +1,237 @@
+from multiprocessing.connection import Client, Listener
+from collections import deque
+from perturbation import Perturbation
+from graph import Graph
+from file_exporter import export, export_arrays
+from extinction_record import export_species_names
+from worker_state import seed_random
+import hashlib
+import pickle
+import threading
+import time
+import os
+
+
+class Coordinator:
+    """
+    Hands out perturbation tasks to workers running on any machine and collects their results.
+
+    Every task is a (scenario, perturbation id, seed) triple. Workers fetch the prepared graph of a
+    scenario once and cache it, so only the small task descriptions travel over the network.
+    A task handed out to a worker is leased: if its result does not arrive before the lease
+    timeout, the task is handed out again to the next worker asking for work. Expired leases are
+    only checked when a worker asks for a task, there is no timer requeuing them on its own.
+
+    Messages are exchanged over multiprocessing connections, which authenticate both sides with
+    the shared authkey and then unpickle what they receive: anyone holding the key can run code on
+    the coordinator and the workers. Use a secret, random key and only listen on trusted networks.
+    """
+
+    def __init__(self, address: tuple, authkey: bytes, results_dir: str = 'results', lease_timeout: float = 3600.0) -> None:
+        """
+        Parameters:
+        -----------
+        address : tuple
+            (host, port) the coordinator listens on. Port 0 picks a free port.
+        authkey : bytes
+            Secret key shared with the workers to authenticate connections, e.g. secrets.token_hex(16).encode().
+        results_dir : str, optional
+            Directory the results are written to, one subdirectory per scenario. Default is 'results'.
+        lease_timeout : float, optional
+            Number of seconds after which a task without result is handed out again. Default is 3600.0.
+        """
+        self.listener = Listener(address, authkey=authkey)
+        self.address = self.listener.address
+        self.results_dir = results_dir
+        self.lease_timeout = lease_timeout
+        self.scenarios = {}
+        self.pending = deque()
+        self.leased = {}
+        self.completed = set()
+        self.n_tasks = 0
+        self._lock = threading.Lock()
+        self._finished = threading.Event()
+
+
+    def add_scenario(self, name: str, graph: Graph, k: int, save_nodes: bool = False, seed: int = 0) -> None:
+        """
+        Registers a prepared graph (with its attack strategy already set up) and queues k perturbations on it.
+
+        Parameters:
+        -----------
+        name : str
+            Name of the scenario, used as subdirectory of the results directory.
+        graph : Graph
+            The prepared graph of the scenario.
+        k : int
+            Number of perturbations to run on the scenario.
+        save_nodes : bool, optional
+            Whether to track the removed nodes. Default is False.
+        seed : int, optional
+            Seed of the first perturbation, perturbation i uses seed + i. Default is 0.
+        """
+        payload = pickle.dumps(graph)
+        self.scenarios[name] = {'payload': payload, 'digest': hashlib.sha1(payload).hexdigest()}
+        if save_nodes:
+            export_species_names(graph.species_names, directory=os.path.join(self.results_dir, name))
+
+        for i in range(k):
+            self.pending.append({
+                'task_id': f'{name}/{i:04}',
+                'scenario': name,
+                'digest': self.scenarios[name]['digest'],
+                'perturbation_id': i,
+                'seed': seed + i,
+                'save_nodes': save_nodes,
+            })
+        self.n_tasks += k
+
+
+    def run(self) -> None:
+        """
+        Serves tasks until the results of all queued tasks have been received.
+        """
+        print(">>> coordinator listening on", self.address, "with", self.n_tasks, "tasks")
+        accept_thread = threading.Thread(target=self._accept, daemon=True)
+        accept_thread.start()
+
+        self._finished.wait()
+        self.listener.close()
+        print(">>> all tasks completed, results are saved in the results directory")
+
+
+    def _accept(self) -> None:
+        while not self._finished.is_set():
+            try:
+                connection = self.listener.accept()
+            except OSError:
+                return  # listener closed
+            threading.Thread(target=self._serve, args=(connection,), daemon=True).start()
+
+
+    def _serve(self, connection) -> None:
+        """
+        Answers the requests of one worker until it disconnects.
+        """
+        with connection:
+            while True:
+                try:
+                    message = connection.recv()
+                except (EOFError, OSError):
+                    return
+
+                request = message[0]
+                if request == 'get_task':
+                    connection.send(self._next_task())
+                elif request == 'get_scenario':
+                    connection.send(('scenario', self.scenarios[message[1]]['payload']))
+                elif request == 'result':
+                    self._store_result(*message[1:])
+                    connection.send(('ack',))
+
+
+    def _next_task(self) -> tuple:
+        with self._lock:
+            self._requeue_expired_leases()
+
+            if self.pending:
+                task = self.pending.popleft()
+                self.leased[task['task_id']] = (task, time.time() + self.lease_timeout)
+                return ('task', task)
+            if self.leased:
+                return ('wait', 1.0)
+            return ('done',)
+
+
+    def _requeue_expired_leases(self) -> None:
+        now = time.time()
+        for task_id, (task, deadline) in list(self.leased.items()):
+            if deadline < now:
+                print(">>> lease of task", task_id, "expired, requeuing it")
+                del self.leased[task_id]
+                self.pending.append(task)
+
+
+    def _store_result(self, task: dict, metrics_evolution: dict, extinction_record: dict) -> None:
+        with self._lock:
+            if task['task_id'] in self.completed:
+                return  # late result of a task which has been handed out again
+            self.completed.add(task['task_id'])
+            self.leased.pop(task['task_id'], None)
+            self.pending = deque(pending for pending in self.pending if pending['task_id'] != task['task_id'])
+            all_completed = len(self.completed) == self.n_tasks
+
+        directory = os.path.join(self.results_dir, task['scenario'])
+        export(metrics_evolution, f"perturbation_{task['perturbation_id']:04}", directory=directory)
+        if extinction_record is not None:
+            export_arrays(extinction_record, f"extinctions_{task['perturbation_id']:04}", directory=directory)
+
+        if all_completed:
+            self._finished.set()
+
+
+def run_worker(address: tuple, authkey: bytes, cache_dir: str = None) -> None:
+    """
+    Runs tasks of the coordinator at the given address until it reports that all tasks are done.
+
+    Parameters:
+    -----------
+    address : tuple
+        (host, port) of the coordinator.
+    authkey : bytes
+        Secret key shared with the coordinator to authenticate the connection.
+    cache_dir : str, optional
+        Directory the prepared graphs are cached in, so that restarted workers do not fetch them again.
+    """
+    graphs = {}
+
+    with Client(address, authkey=authkey) as connection:
+        while True:
+            try:
+                connection.send(('get_task',))
+                reply = connection.recv()
+            except (EOFError, ConnectionError):
+                return  # the coordinator shut down after receiving all results
+
+            if reply[0] == 'done':
+                return
+            if reply[0] == 'wait':
+                time.sleep(reply[1])
+                continue
+
+            task = reply[1]
+            key = (task['scenario'], task['digest'])
+            if key not in graphs:
+                graphs[key] = _load_scenario(connection, task, cache_dir)
+
+            seed_random(task['seed'])
+
+            perturbation = Perturbation(task['perturbation_id'], graphs[key].copy(), task['save_nodes'])
+            perturbation.run()
+
+            try:
+                connection.send(('result', task, perturbation.get_metric_evolution(), perturbation.get_extinction_record()))
+                connection.recv()
+            except (EOFError, ConnectionError):
+                return  # the coordinator shut down, e.g. after receiving the result of this task from another worker
+
+
+def _load_scenario(connection, task: dict, cache_dir: str) -> Graph:
+    """
+    Returns the prepared graph of the task's scenario from the cache directory, or fetches it from the coordinator.
+    """
+    cache_path = os.path.join(cache_dir, f"{task['scenario']}-{task['digest']}.pickle") if cache_dir else None
+
+    if cache_path and os.path.exists(cache_path):
+        with open(cache_path, 'rb') as f:
+            return pickle.load(f)
+
+    connection.send(('get_scenario', task['scenario']))
+    payload = connection.recv()[1]
+
+    if cache_path:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(cache_path, 'wb') as f:
+            f.write(payload)
+
+    return pickle.loads(payload)
@@ -0,0 +1,422 @@
+import networkx as nx
+import numpy as np
+import heapq
+from compact_graph import CompactGraph
+from file_exporter import export
+
+
+class DominatorTree:
+    """
+    Dominator tree of the prey -> consumer graph, rooted at a virtual root feeding all basal species.
+
+    A species X dominates a species v if every feeding path from the basal species to v passes through X.
+    Under the cascade rule of Graph.remove_node_and_dependents (a consumer goes extinct once it has no prey
+    left), removing X from the intact web drives extinct exactly the species X dominates, so the cascade size
+    of every species is the size of its dominator subtree minus one, computed for all species in one pass.
+
+    Note:
+    - Self-loops are ignored, as in the cascade rule.
+    - The cascade sizes are exact when the web has no feeding cycles. In a cycle, species keep feeding on
+      each other after losing their other prey, so the cascade size is an upper bound of the removal.
+    - Species which cannot be reached from a basal species (only fed by such cycles) are not dominated
+      by any species and get a cascade size of 0, although removing one of them can drive other such
+      species extinct. Removing a reachable species never affects them.
+
+    The tree can be kept up to date while species are removed (see remove), which only recomputes the immediate
+    dominators of the species whose dominator set changed.
+
+    Attributes:
+    -----------
+    graph : CompactGraph
+        The food web the tree was computed on.
+    alive : np.ndarray
+        Whether every species is still in the web.
+    idom : np.ndarray
+        Immediate dominator of every species, -1 for species dominated only by the virtual root
+        and -2 for species which cannot be reached from a basal species (or were removed).
+    position : np.ndarray
+        Position of every species in the reverse postorder the tree was computed on, 0 if unreachable.
+    cascade_sizes : np.ndarray
+        Number of secondary extinctions caused by removing each species from the current web.
+    """
+
+    ROOT = -1
+    UNREACHABLE = -2
+
+    def __init__(self, graph: CompactGraph) -> None:
+        self.graph = graph
+        self.alive = np.ones(len(graph), dtype=bool)
+        self._recompute()
+
+
+    @classmethod
+    def from_nx_graph(cls, nx_graph: nx.DiGraph) -> 'DominatorTree':
+        return cls(CompactGraph.from_nx_graph(nx_graph))
+
+
+    def _recompute(self) -> None:
+        self.position, self.idom = self._compute(self.graph, self.alive)
+        self.cascade_sizes = self._cascade_sizes()
+
+
+    @staticmethod
+    def _compute(graph: CompactGraph, alive: np.ndarray) -> tuple:
+        """
+        Iterative dominator algorithm (Cooper, Harvey & Kennedy) on the reverse postorder of a depth first
+        search from the virtual root, over the species still alive. Node 0 is the virtual root, species i
+        is node i + 1.
+        """
+        n = len(graph)
+        order = _reverse_postorder(graph, alive)  # species ids, reachable species only
+        position = np.full(n + 1, -1, dtype=np.int64)
+        position[0] = 0
+        position[order + 1] = np.arange(1, len(order) + 1)
+
+        # Predecessors of every species in reverse postorder positions, the virtual root for basal species
+        predecessors = []
+        for species in order:
+            prey = graph.prey(species)
+            prey = prey[prey != species]
+            predecessors.append(position[prey[alive[prey]] + 1] if len(prey) else np.array([0]))
+
+        idom = np.full(len(order) + 1, -1, dtype=np.int64)
+        idom[0] = 0
+
+        changed = True
+        while changed:
+            changed = False
+            for node in range(1, len(order) + 1):
+                new_idom = -1
+                for predecessor in predecessors[node - 1]:
+                    if predecessor < 0 or idom[predecessor] < 0:
+                        continue  # unreachable or not processed yet
+                    new_idom = predecessor if new_idom < 0 else _intersect(idom, predecessor, new_idom)
+                    if new_idom == 0:
+                        break  # dominated by the virtual root only
+                if idom[node] != new_idom:
+                    idom[node] = new_idom
+                    changed = True
+
+        species_position = np.zeros(n, dtype=np.int64)
+        species_position[order] = np.arange(1, len(order) + 1)
+        species_idom = np.full(n, DominatorTree.UNREACHABLE, dtype=np.int64)
+        species_idom[order] = np.where(idom[1:] == 0, DominatorTree.ROOT, order[np.maximum(idom[1:] - 1, 0)])
+        return species_position, species_idom
+
+
+    def _cascade_sizes(self) -> np.ndarray:
+        """
+        Returns the size of the dominator subtree of every species minus one, accumulated level by level
+        from the deepest species upwards.
+        """
+        reachable = self.idom != self.UNREACHABLE
+        depth = reachable.astype(np.int64)
+        ancestor = np.where(reachable, self.idom, self.ROOT)
+        inner = ancestor >= 0
+        while inner.any():
+            depth[inner] += 1
+            ancestor[inner] = self.idom[ancestor[inner]]
+            inner = ancestor >= 0
+
+        subtree = reachable.astype(np.int64)
+        for level in range(int(depth.max(initial=0)), 1, -1):
+            nodes = np.flatnonzero(depth == level)
+            np.add.at(subtree, self.idom[nodes], subtree[nodes])
+        return np.where(reachable, subtree - 1, 0)
+
+
+    def remove(self, species: list) -> np.ndarray:
+        """
+        Removes species from the web and updates the tree. Only the species whose dominator set may have changed,
+        starting from the consumers which lost prey, get their immediate dominator recomputed, in reverse postorder.
+        When the update runs into a feeding cycle, the species reachable from these consumers are recomputed instead.
+
+        Parameters:
+        -----------
+        species : list
+            Ids of the removed species.
+
+        Returns:
+        --------
+        np.ndarray
+            Ids of the remaining species whose dominator subtree changed, i.e. whose cascade may have changed.
+        """
+        removed = [s for s in dict.fromkeys(int(s) for s in species) if self.alive[s]]
+        if not removed:
+            return np.array([], dtype=np.int64)
+
+        old_idom = self.idom.tolist()
+        self.alive[removed] = False
+        consumers = self.graph.consumer_links(np.array(removed, dtype=np.int64))[1]
+        affected = [consumer for consumer in dict.fromkeys(consumers.tolist()) if self.alive[consumer]]
+
+        changed = self._update(affected)
+        if changed is None:
+            changed = self._update_region(affected)
+
+        self.idom[removed] = self.UNREACHABLE
+        self.position[removed] = 0
+        self.cascade_sizes = self._cascade_sizes()
+
+        invalid = _ancestors(old_idom, removed + changed + affected) | _ancestors(self.idom.tolist(), changed + affected)
+        return np.array(sorted(s for s in invalid if self.alive[s]), dtype=np.int64)
+
+
+    def _update(self, affected: list) -> list:
+        """
+        Recomputes the immediate dominators of the species whose dominator set may have changed, in reverse postorder,
+        as the closest common dominator of their remaining prey. The dominator set of a species changes if its
+        immediate dominator or the dominator set of the latter changed, in which case its consumers are checked next.
+
+        Returns the species whose immediate dominator changed, or None if a species feeds on or is fed on by a species
+        from after it in the order, or is kept alive by unreachable prey only, i.e. the removal affects a feeding cycle.
+        """
+        # Lists with the virtual root as last entry, so that idom[ROOT] and position[ROOT] are valid
+        idom = self.idom.tolist() + [self.ROOT]
+        position = self.position.tolist() + [0]
+        alive = self.alive.tolist() + [True]
+
+        def common_dominator(a: int, b: int) -> int:
+            while a != b:
+                while position[a] > position[b]:
+                    a = idom[a]
+                    if not alive[a]:
+                        return None
+                while position[b] > position[a]:
+                    b = idom[b]
+                    if not alive[b]:
+                        return None
+            return a
+
+        queue = [(position[species], species) for species in affected if position[species] > 0]  # unreachable species stay unreachable
+        heapq.heapify(queue)
+        queued = {species for _, species in queue}
+        dominators_changed = set()
+        changed = []
+
+        while queue:
+            current, species = heapq.heappop(queue)
+            new_idom = None
+            for prey in self.graph.prey(species).tolist():
+                if prey == species or not alive[prey] or position[prey] == 0:
+                    continue  # self-loop, removed or unreachable prey
+                if position[prey] > current:
+                    return None  # prey from after it in the order, its dominators may not be updated yet
+                new_idom = prey if new_idom is None else common_dominator(new_idom, prey)
+                if new_idom is None:
+                    return None
+                if new_idom == self.ROOT:
+                    break
+            if new_idom is None or position[new_idom] >= current:
+                return None
+
+            ancestor = new_idom
+            while ancestor != self.ROOT:  # the chain of a dominator removed with its prey is stale
+                if ancestor == self.UNREACHABLE or not alive[ancestor]:
+                    return None
+                ancestor = idom[ancestor]
+
+            if new_idom == idom[species] and new_idom not in dominators_changed:
+                continue
+            if new_idom != idom[species]:
+                idom[species] = new_idom
+                changed.append(species)
+            dominators_changed.add(species)
+
+            for consumer in self.graph.consumers_of(species).tolist():
+                if consumer == species or not alive[consumer] or position[consumer] == 0:
+                    continue
+                if position[consumer] <= current:
+                    return None
+                if consumer not in queued:
+                    queued.add(consumer)
+                    heapq.heappush(queue, (position[consumer], consumer))
+
+        self.idom[changed] = [idom[species] for species in changed]
+        return changed
+
+
+    def _update_region(self, affected: list) -> list:
+        """
+        Recomputes the immediate dominators of all species reachable from the consumers which lost prey, which
+        include every species whose dominators may have changed, with the iterative algorithm on this part of
+        the web only. The region gets a new reverse postorder, from the species it feeds on, placed after all
+        other species (none of which is dominated by a species of the region).
+
+        Returns the species whose immediate dominator changed, including those which became unreachable.
+        """
+        alive = self.alive
+        region = set(affected)
+        stack = list(affected)
+        while stack:
+            for consumer in self.graph.consumers_of(stack.pop()).tolist():
+                if alive[consumer] and consumer not in region:
+                    region.add(consumer)
+                    stack.append(consumer)
+
+        # Lists with the virtual root as last entry, so that idom[ROOT] and position[ROOT] are valid
+        idom = self.idom.tolist() + [self.ROOT]
+        position = self.position.tolist() + [0]
+        base = max(position)
+        for species in region:
+            position[species] = 0
+
+        def is_entry(species: int) -> bool:
+            return any(alive[prey] and prey not in region and position[prey] > 0 for prey in self.graph.prey(species).tolist())
+
+        visited, postorder = set(), []
+        for entry in sorted(species for species in region if is_entry(species)):
+            if entry in visited:
+                continue
+            visited.add(entry)
+            stack = [(entry, iter(self.graph.consumers_of(entry).tolist()))]
+            while stack:
+                node, consumers = stack[-1]
+                for consumer in consumers:
+                    if alive[consumer] and consumer not in visited:
+                        visited.add(consumer)
+                        stack.append((consumer, iter(self.graph.consumers_of(consumer).tolist())))
+                        break
+                else:
+                    postorder.append(node)
+                    stack.pop()
+        order = postorder[::-1]
+        for i, species in enumerate(order):
+            position[species] = base + i + 1
+
+        predecessors = {}
+        for species in order:
+            prey = self.graph.prey(species).tolist()
+            predecessors[species] = [p for p in prey if p != species and alive[p] and position[p] > 0]
+            idom[species] = None
+
+        def intersect(a: int, b: int) -> int:
+            while a != b:
+                while position[a] > position[b]:
+                    a = idom[a]
+                while position[b] > position[a]:
+                    b = idom[b]
+            return a
+
+        changed = True
+        while changed:
+            changed = False
+            for species in order:
+                new_idom = None
+                for prey in predecessors[species]:
+                    if idom[prey] is None:
+                        continue  # not processed yet
+                    new_idom = prey if new_idom is None else intersect(new_idom, prey)
+                    if new_idom == self.ROOT:
+                        break
+                if idom[species] != new_idom:
+                    idom[species] = new_idom
+                    changed = True
+
+        region = sorted(region)
+        new_idoms = [idom[species] if species in visited else self.UNREACHABLE for species in region]
+        changed = [species for species, new_idom in zip(region, new_idoms) if new_idom != self.idom[species]]
+        self.idom[region] = new_idoms
+        self.position[region] = [position[species] for species in region]
+        return changed
+
+
+    def cascade_size(self, species: str) -> int:
+        return int(self.cascade_sizes[self.graph.index[species]])
+
+
+    def dominated(self, species: str) -> list:
+        """
+        Returns the species which go extinct when the given species is removed from the current web.
+        """
+        root = self.graph.index[species]
+        children = {}
+        for node, parent in enumerate(self.idom):
+            children.setdefault(parent, []).append(node)
+
+        dominated, stack = [], list(children.get(root, []))
+        while stack:
+            node = stack.pop()
+            dominated.append(self.graph.names[node])
+            stack.extend(children.get(node, []))
+        return dominated
+
+
+    def to_dict(self) -> dict:
+        """
+        Returns the cascade size and immediate dominator of every species.
+        """
+        names = self.graph.names
+        return {
+            'species': names,
+            'cascade_size': self.cascade_sizes,
+            'immediate_dominator': [names[i] if i >= 0 else ('root' if i == self.ROOT else 'unreachable') for i in self.idom],
+        }
+
+
+def _reverse_postorder(graph: CompactGraph, alive: np.ndarray) -> np.ndarray:
+    """
+    Returns the species reachable from the basal species in reverse postorder of an iterative depth
+    first search from the virtual root, over the species still alive.
+    """
+    visited = ~alive
+    postorder = []
+
+    for basal in graph.basal():
+        if visited[basal]:
+            continue
+        visited[basal] = True
+        stack = [(basal, iter(graph.consumers_of(basal)))]
+        while stack:
+            node, consumers = stack[-1]
+            for consumer in consumers:
+                if not visited[consumer]:
+                    visited[consumer] = True
+                    stack.append((consumer, iter(graph.consumers_of(consumer))))
+                    break
+            else:
+                postorder.append(node)
+                stack.pop()
+
+    return np.array(postorder[::-1], dtype=np.int64)
+
+
+def _ancestors(idom: list, species: list) -> set:
+    """
+    Returns the strict ancestors of the given species in the dominator tree, without the virtual root.
+    """
+    ancestors = set()
+    for node in species:
+        node = idom[node]
+        while node >= 0 and node not in ancestors:
+            ancestors.add(node)
+            node = idom[node]
+    return ancestors
+
+
+def _intersect(idom: np.ndarray, a: int, b: int) -> int:
+    """
+    Returns the closest common dominator of two nodes, given as reverse postorder positions.
+    """
+    while a != b:
+        while a > b:
+            a = idom[a]
+        while b > a:
+            b = idom[b]
+    return a
+
+
+def cascade_sizes(nx_graph: nx.DiGraph) -> dict:
+    """
+    Returns the number of secondary extinctions caused by removing each species from the given graph.
+    Can be used as Sequential.SortBy metric.
+    """
+    tree = DominatorTree.from_nx_graph(nx_graph)
+    return dict(zip(tree.graph.names, tree.cascade_sizes.tolist()))
+
+
+def export_cascade_sizes(nx_graph: nx.DiGraph, filename: str = 'cascade_sizes', directory: str = 'results') -> None:
+    """
+    Exports the cascade size and immediate dominator of every species as a csv file.
+    """
+    export(DominatorTree.from_nx_graph(nx_graph).to_dict(), filename, directory=directory)
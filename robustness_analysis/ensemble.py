@@ -0,0 +1,216 @@
+from multiprocessing import Pool, cpu_count
+from metaweb import MetawebProcessor, ProcessingStrategy
+from compact_graph import CompactGraph
+from worker_state import init_worker, worker_state, seed_random
+import pandas as pd
+import numpy as np
+import constants
+
+
+class MetawebEnsemble:
+    """
+    Ensemble of randomized metawebs, each stored as a delta over the shared base metaweb: the positions
+    of the removed base links and the (consumer, resource) ids of the added links. Memory therefore
+    scales with the number of changed links instead of the number of realizations times the metaweb.
+
+    Realizations are drawn in parallel with independent seeds, and materialized into a CompactGraph
+    (or an edge list for Graph) only where they are used, e.g. on the worker running a perturbation.
+
+    Attributes:
+    -----------
+    names : np.ndarray
+        Name table shared by all realizations: the species of the base metaweb followed by the species
+        that can only appear through generated links.
+    base_consumers, base_resources : np.ndarray
+        Species ids of the base links.
+    removed : list
+        Removed base links of every realization, as positions or as a packed boolean mask,
+        whichever is smaller.
+    added : list
+        Added links of every realization, as an array of (consumer, resource) ids.
+    seeds : list
+        Seed of every realization.
+    seed_sequences : dict
+        SeedSequence of every seed passed to generate, which keeps spawning new realization seeds
+        when the same seed is passed again.
+    """
+
+    def __init__(self, base_edges: pd.DataFrame, source: str = constants.SOURCE_COL, target: str = constants.TARGET_COL) -> None:
+        self.source = source
+        self.target = target
+        codes, names = pd.factorize(pd.concat([base_edges[source], base_edges[target]], ignore_index=True))
+        self.names = np.asarray(names, dtype=object)
+        self.base_consumers = codes[:len(base_edges)].astype(np.int32)
+        self.base_resources = codes[len(base_edges):].astype(np.int32)
+        self.removed = []
+        self.added = []
+        self.seeds = []
+        self.seed_sequences = {}
+
+
+    def __len__(self) -> int:
+        return len(self.removed)
+
+
+    def generate(self, n: int, strategy: ProcessingStrategy, data_processor: MetawebProcessor, seed: int = 0, processes: int = None) -> None:
+        """
+        Draws n randomized metawebs in parallel and appends their deltas to the ensemble.
+
+        Parameters:
+        -----------
+        n : int
+            Number of realizations to draw.
+        strategy : ProcessingStrategy
+            GENERATE_AND_REMOVE or REMOVE, as in Metaweb.setup.
+        data_processor : MetawebProcessor
+            Processor generating and removing the links.
+        seed : int, optional
+            Seed from which the independent seeds of the realizations are spawned. Default is 0.
+            Calling generate again with the same seed continues spawning from it, so the ensemble
+            never contains a realization twice.
+        processes : int, optional
+            Number of worker processes. Default is cpu_count().
+        """
+        if strategy == ProcessingStrategy.USE_AS_IS:
+            raise ValueError("USE_AS_IS does not randomize the metaweb")
+
+        self._extend_names(data_processor)
+        sequence = self.seed_sequences.setdefault(seed, np.random.SeedSequence(seed))
+        seeds = [int(child.generate_state(1)[0]) for child in sequence.spawn(n)]
+
+        base_edges = pd.DataFrame({self.source: self.names[self.base_consumers], self.target: self.names[self.base_resources]})
+        state = dict(base_edges=base_edges, data_processor=data_processor, strategy=strategy,
+                     index={name: i for i, name in enumerate(self.names)}, source=self.source, target=self.target)
+        with Pool(processes=processes or cpu_count(), initializer=init_worker, initargs=(state,)) as pool:
+            deltas = pool.map(_draw_realization, seeds)
+
+        for removed, added in deltas:
+            self.removed.append(self._compress_removed(removed))
+            self.added.append(added)
+        self.seeds.extend(seeds)
+
+
+    def _extend_names(self, data_processor: MetawebProcessor) -> None:
+        """
+        Appends the species which can only appear through generated links to the name table,
+        so that all realizations share the same species ids.
+        """
+        candidates = pd.concat([data_processor.rand_link_species['Taxon'], data_processor.all_species['Taxon']]).unique()
+        known = set(self.names)
+        self.names = np.concatenate([self.names, np.array([name for name in candidates if name not in known], dtype=object)])
+
+
+    def _compress_removed(self, removed: np.ndarray) -> tuple:
+        n_base = len(self.base_consumers)
+        if removed.nbytes <= (n_base + 7) // 8:
+            return ('positions', removed)
+        mask = np.zeros(n_base, dtype=bool)
+        mask[removed] = True
+        return ('mask', np.packbits(mask))
+
+
+    def kept_base_links(self, i: int) -> np.ndarray:
+        """
+        Returns a boolean mask of the base links kept in realization i.
+        """
+        kind, data = self.removed[i]
+        n_base = len(self.base_consumers)
+        if kind == 'mask':
+            return ~np.unpackbits(data, count=n_base).astype(bool)
+        kept = np.ones(n_base, dtype=bool)
+        kept[data] = False
+        return kept
+
+
+    def materialize(self, i: int) -> CompactGraph:
+        """
+        Returns realization i as a CompactGraph, restricted to the species it contains.
+        """
+        kept = self.kept_base_links(i)
+        consumers = np.concatenate([self.base_consumers[kept], self.added[i][:, 0]])
+        resources = np.concatenate([self.base_resources[kept], self.added[i][:, 1]])
+
+        species, codes = np.unique(np.concatenate([consumers, resources]), return_inverse=True)
+        return CompactGraph(self.names[species], codes[:len(consumers)], codes[len(consumers):])
+
+
+    def materialize_edges(self, i: int) -> pd.DataFrame:
+        """
+        Returns realization i as a metaweb edge list, e.g. to create a Graph from it.
+        """
+        kept = self.kept_base_links(i)
+        consumers = np.concatenate([self.base_consumers[kept], self.added[i][:, 0]])
+        resources = np.concatenate([self.base_resources[kept], self.added[i][:, 1]])
+        return pd.DataFrame({self.source: self.names[consumers], self.target: self.names[resources]})
+
+
+    def map(self, function, processes: int = None) -> list:
+        """
+        Applies function(i, compact_graph) to every realization in parallel. The realizations are
+        materialized on the workers, which receive the shared base and the deltas only once.
+        The function must be picklable, i.e. defined at module level.
+        """
+        with Pool(processes=processes or cpu_count(), initializer=init_worker, initargs=(dict(ensemble=self, function=function),)) as pool:
+            return pool.map(_apply, range(len(self)))
+
+
+    def save(self, path: str) -> None:
+        """
+        Saves the ensemble as a compressed npz file.
+        """
+        arrays = {'names': self.names.astype(str), 'base_consumers': self.base_consumers, 'base_resources': self.base_resources,
+                  'seeds': np.array(self.seeds, dtype=np.int64),
+                  'seed_sequences': np.array([(seed, sequence.n_children_spawned) for seed, sequence in self.seed_sequences.items()], dtype=np.int64).reshape(-1, 2)}
+        for i, ((kind, data), added) in enumerate(zip(self.removed, self.added)):
+            arrays[f'removed_{kind}_{i}'] = data
+            arrays[f'added_{i}'] = added
+        np.savez_compressed(path, **arrays)
+
+
+    @classmethod
+    def load(cls, path: str, source: str = constants.SOURCE_COL, target: str = constants.TARGET_COL) -> 'MetawebEnsemble':
+        data = np.load(path)
+        ensemble = cls.__new__(cls)
+        ensemble.source = source
+        ensemble.target = target
+        ensemble.names = data['names'].astype(object)
+        ensemble.base_consumers = data['base_consumers']
+        ensemble.base_resources = data['base_resources']
+        ensemble.seeds = data['seeds'].tolist()
+        ensemble.seed_sequences = {int(seed): np.random.SeedSequence(int(seed), n_children_spawned=int(spawned)) for seed, spawned in data['seed_sequences']}
+        ensemble.removed = []
+        ensemble.added = []
+        for i in range(len(ensemble.seeds)):
+            kind = 'mask' if f'removed_mask_{i}' in data else 'positions'
+            ensemble.removed.append((kind, data[f'removed_{kind}_{i}']))
+            ensemble.added.append(data[f'added_{i}'])
+        return ensemble
+
+
+def _draw_realization(seed: int) -> tuple:
+    """
+    Draws one randomized metaweb like Metaweb.setup and returns it as (removed base positions, added links).
+    """
+    state = worker_state()
+    seed_random(seed)
+
+    base_edges = state['base_edges']
+    n_base = len(base_edges)
+    edges = base_edges
+
+    if state['strategy'] == ProcessingStrategy.GENERATE_AND_REMOVE:
+        new_edges = state['data_processor'].generate_links()
+        edges = pd.concat([base_edges, new_edges[[state['source'], state['target']]]]).reset_index(drop=True)
+
+    dropped = np.array(state['data_processor'].sample_links_to_remove(edges), dtype=np.int64)
+    kept_new = np.setdiff1d(np.arange(n_base, len(edges)), dropped)
+
+    index = state['index']
+    added = np.array([(index[consumer], index[resource]) for consumer, resource in edges.iloc[kept_new][[state['source'], state['target']]].itertuples(index=False)],
+                     dtype=np.int32).reshape(-1, 2)
+    return dropped[dropped < n_base].astype(np.int32), added
+
+
+def _apply(i: int):
+    state = worker_state()
+    return state['function'](i, state['ensemble'].materialize(i))
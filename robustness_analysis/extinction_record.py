@@ -0,0 +1,118 @@
+from enum import Enum
+from file_exporter import export, results_directory
+import numpy as np
+import pandas as pd
+import glob
+import os
+
+
+class RemovalType(Enum):
+    """
+    Stores how a species was removed from the graph, as stored in the removal_type array.
+    """
+
+    PRIMARY = 0
+    SECONDARY = 1
+
+
+class ExtinctionRecord:
+    """
+    Records the extinction order of a perturbation in preallocated integer arrays, one entry per species.
+
+    Attributes:
+    -----------
+    species : np.ndarray (int32)
+        Id of the removed species, i.e. its position in the name table of the graph.
+    removal_type : np.ndarray (uint8)
+        RemovalType value of the removal.
+    step : np.ndarray (int32)
+        Perturbation step (index of the primary removal) at which the species was removed.
+    trigger : np.ndarray (int32)
+        Id of the primary removal which triggered a secondary extinction, -1 for primary removals.
+    """
+
+    def __init__(self, n_species: int) -> None:
+        self.species = np.full(n_species, -1, dtype=np.int32)
+        self.removal_type = np.zeros(n_species, dtype=np.uint8)
+        self.step = np.zeros(n_species, dtype=np.int32)
+        self.trigger = np.full(n_species, -1, dtype=np.int32)
+        self.size = 0
+
+
+    def record(self, step: int, primary: int, dependents: list) -> None:
+        """
+        Records a primary removal and the secondary extinctions it caused.
+
+        Parameters:
+        -----------
+        step : int
+            Index of the perturbation step.
+        primary : int
+            Id of the species chosen for removal.
+        dependents : list
+            Ids of the species which went extinct as a consequence.
+        """
+        start, end = self.size, self.size + 1 + len(dependents)
+        self.species[start] = primary
+        self.species[start + 1:end] = dependents
+        self.removal_type[start] = RemovalType.PRIMARY.value
+        self.removal_type[start + 1:end] = RemovalType.SECONDARY.value
+        self.step[start:end] = step
+        self.trigger[start + 1:end] = primary
+        self.size = end
+
+
+    def to_arrays(self) -> dict:
+        """
+        Returns the recorded part of the arrays, e.g. to be exported with file_exporter.export_arrays.
+        """
+        return {
+            'species': self.species[:self.size],
+            'removal_type': self.removal_type[:self.size],
+            'step': self.step[:self.size],
+            'trigger': self.trigger[:self.size],
+        }
+
+
+def export_species_names(species_names: np.ndarray, directory: str = 'results') -> None:
+    """
+    Exports the name table the species ids of the extinction records refer to, once per run.
+    """
+    export({'species_id': np.arange(len(species_names)), 'species': species_names}, 'species_names.csv', directory=directory)
+
+
+def load_species_names(directory: str) -> np.ndarray:
+    return pd.read_csv(os.path.join(results_directory(directory), 'species_names.csv'))['species'].to_numpy(dtype=object)
+
+
+def load_extinction_records(directory: str) -> dict:
+    """
+    Loads the extinction records of all perturbations saved in the given results directory.
+
+    Returns:
+    --------
+    dict
+        The record arrays (species, removal_type, step, trigger) of every perturbation, by perturbation id.
+    """
+    records = {}
+    for path in sorted(glob.glob(os.path.join(results_directory(directory), 'extinctions_*.npz'))):
+        perturbation_id = os.path.basename(path)[len('extinctions_'):-len('.npz')]
+        with np.load(path) as data:
+            records[perturbation_id] = {key: data[key] for key in data.files}
+    return records
+
+
+def extinction_steps(directory: str) -> pd.DataFrame:
+    """
+    Returns the step at which every species went extinct in every perturbation of a results directory,
+    with one row per perturbation and one column per species (-1 if the species was never removed).
+    Per-species statistics over all runs are then plain column operations, e.g. extinction_steps(d).mean().
+    """
+    names = load_species_names(directory)
+    records = load_extinction_records(directory)
+
+    steps = np.full((len(records), len(names)), -1, dtype=np.int32)
+    for row, record in enumerate(records.values()):
+        steps[row, record['species']] = record['step']
+
+    return pd.DataFrame(steps, index=list(records.keys()), columns=names)
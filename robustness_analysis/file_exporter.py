@@ -1,4 +1,6 @@
+import json
 import os
+import numpy as np
 import pandas as pd
 
 
@@ -16,8 +18,55 @@ def export(data: dict, filename: str, directory: str = 'results') -> None:
     """
     
     df = pd.DataFrame.from_dict(data, orient='index').transpose()
-    full_directory = os.path.join(os.path.dirname(__file__), directory)
+    full_directory = results_directory(directory)
     os.makedirs(full_directory, exist_ok=True)
     results_path = os.path.join(full_directory, filename)
 
     df.to_csv(results_path, index=False)
+
+
+def export_json(data: dict, filename: str, directory: str = 'results') -> None:
+    """
+    Export the given dictionary data as a JSON file.
+
+    Parameters:
+    - data: Dictionary to be exported, must be JSON serializable.
+    - filename: Name of the JSON file (without path and extension).
+    - directory: Directory where the JSON should be saved (default is 'results').
+
+    Returns:
+    - None
+    """
+    full_directory = results_directory(directory)
+    os.makedirs(full_directory, exist_ok=True)
+    results_path = os.path.join(full_directory, f'{filename}.json')
+
+    with open(results_path, 'w') as f:
+        json.dump(data, f, indent=2)
+
+
+def export_arrays(arrays: dict, filename: str, directory: str = 'results') -> None:
+    """
+    Export the given dictionary of numpy arrays as an uncompressed npz file.
+
+    Parameters:
+    - arrays: Dictionary of numpy arrays to be exported.
+    - filename: Name of the npz file (without path and extension).
+    - directory: Directory where the npz should be saved (default is 'results').
+
+    Returns:
+    - None
+    """
+    full_directory = results_directory(directory)
+    os.makedirs(full_directory, exist_ok=True)
+    results_path = os.path.join(full_directory, f'{filename}.npz')
+
+    np.savez(results_path, **arrays)
+
+
+def results_directory(directory: str = 'results') -> str:
+    """
+    Returns the path the export functions write a results directory to, relative to this module
+    unless the directory is absolute.
+    """
+    return os.path.join(os.path.dirname(__file__), directory)
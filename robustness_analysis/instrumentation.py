@@ -0,0 +1,143 @@
+import resource
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import numpy as np
+
+
+class Instrumentation:
+    """
+    Records wall time and call counts per phase of a perturbation, the size of every
+    secondary extinction cascade and the peak resident memory of the worker process running it.
+
+    Attributes:
+    -----------
+    wall_time : dict
+        Accumulated wall time in seconds per phase.
+    calls : dict
+        Number of calls per phase.
+    cascade_sizes : list
+        Number of secondary extinctions caused by each primary removal.
+    """
+
+    PHASES = ['compute_metrics', 'submit_metrics', 'collect_metrics', 'record_habitat_metrics', 'choose_node',
+              'remove_node_and_dependents', 'notify_nodes']
+
+    def __init__(self) -> None:
+        self.wall_time = {phase: 0.0 for phase in self.PHASES}
+        self.calls = {phase: 0 for phase in self.PHASES}
+        self.cascade_sizes = []
+        self.total_time = 0.0
+        self._start = None
+
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        Context manager timing one call of the given phase.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.wall_time[name] += time.perf_counter() - start
+            self.calls[name] += 1
+
+
+    def start(self) -> None:
+        self._start = time.perf_counter()
+
+
+    def stop(self) -> None:
+        self.total_time = time.perf_counter() - self._start
+
+
+    def record_cascade(self, size: int) -> None:
+        self.cascade_sizes.append(size)
+
+
+    def summary(self) -> dict:
+        """
+        Returns the recorded measurements as a JSON serializable dictionary.
+
+        Note:
+        - remove_node_and_dependents includes the time spent in notify_nodes.
+        - submit_metrics and collect_metrics replace compute_metrics when a MetricPipeline is used.
+        - worker_peak_rss_mb is the high-water mark of the resident memory of the worker process,
+          which may have run other perturbations before this one. Use the tracemalloc capture
+          of Simulation for the allocations of a single perturbation.
+        """
+        return {
+            'total_time': self.total_time,
+            'wall_time': self.wall_time,
+            'calls': self.calls,
+            'steps': len(self.cascade_sizes),
+            'cascade_sizes': self.cascade_sizes,
+            'worker_peak_rss_mb': worker_peak_rss_mb(),
+        }
+
+
+def worker_peak_rss_mb() -> float:
+    """
+    Returns the peak resident memory of the current process since it started, in megabytes.
+    """
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss / 2**20 if sys.platform == 'darwin' else max_rss / 2**10  # bytes on macOS, kilobytes on linux
+
+
+def aggregate(summaries: list) -> dict:
+    """
+    Aggregates the instrumentation summaries of several perturbations, e.g. of all pool workers.
+
+    Parameters:
+    -----------
+    summaries : list
+        Summaries as returned by Instrumentation.summary.
+
+    Returns:
+    --------
+    dict
+        Total and per call wall time per phase, cascade size statistics and the largest worker peak resident memory.
+    """
+    phases = Instrumentation.PHASES
+    wall_time = {phase: sum(summary['wall_time'][phase] for summary in summaries) for phase in phases}
+    calls = {phase: sum(summary['calls'][phase] for summary in summaries) for phase in phases}
+    cascade_sizes = np.concatenate([summary['cascade_sizes'] for summary in summaries] + [[]])
+    total_time = sum(summary['total_time'] for summary in summaries)
+
+    return {
+        'perturbations': len(summaries),
+        'total_time': total_time,
+        'wall_time': wall_time,
+        'calls': calls,
+        'time_per_call': {phase: wall_time[phase] / calls[phase] if calls[phase] else 0.0 for phase in phases},
+        'time_share': {phase: wall_time[phase] / total_time if total_time else 0.0 for phase in phases},
+        'cascade_sizes': {
+            'primary_removals': int(len(cascade_sizes)),
+            'mean': float(cascade_sizes.mean()) if len(cascade_sizes) else 0.0,
+            'max': int(cascade_sizes.max()) if len(cascade_sizes) else 0,
+            'p50': float(np.percentile(cascade_sizes, 50)) if len(cascade_sizes) else 0.0,
+            'p99': float(np.percentile(cascade_sizes, 99)) if len(cascade_sizes) else 0.0,
+        },
+        'worker_peak_rss_mb': max((summary['worker_peak_rss_mb'] for summary in summaries), default=0.0),
+    }
+
+
+@contextmanager
+def memory_trace(top: int = 25):
+    """
+    Context manager tracing the allocations made inside it with tracemalloc.
+    Yields a list that is filled with the peak traced memory and the top allocation sites on exit.
+    """
+    report = []
+    tracemalloc.start()
+    try:
+        yield report
+    finally:
+        _, peak = tracemalloc.get_traced_memory()
+        statistics = tracemalloc.take_snapshot().statistics('lineno')[:top]
+        tracemalloc.stop()
+        report.append(f"peak traced memory: {peak / 2**20:.2f} MB")
+        report.extend(str(statistic) for statistic in statistics)
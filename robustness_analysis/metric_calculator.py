@@ -1,5 +1,7 @@
 import networkx as nx
+import numpy as np
 from enum import Enum
+from compact_graph import CompactGraph
 
 class Metrics(Enum):
     """
@@ -20,14 +22,33 @@ class MetricCalculator():
     Attributes:
     -----------
     METRICS : list of str
-        List of metric method names available in this class.
+        List of metric method names computed by default.
+    AVAILABLE_METRICS : list of str
+        List of all metric method names, the default ones followed by the more expensive ones.
+    DECIMAL_POS : int
+        Decimal precision of the computed metrics.
+    metrics : list of str
+        List of metric method names computed by this calculator.
     """
     
     METRICS = [metric.value for metric in Metrics]
-    
+    AVAILABLE_METRICS = METRICS + ['largest_wcc_size', 'largest_ssc_size', 'number_of_sccs', 'avg_pagerank', 'avg_betweenness',
+                                   'avg_in_closeness', 'avg_shortest_path_lssc', 'avg_trophic_level']
+    DECIMAL_POS = 5
+
+    def __init__(self, metrics: list = None) -> None:
+        """
+        Parameters:
+        -----------
+        metrics : list, optional
+            Names of the metric methods to compute, e.g. ['graph_size', 'avg_betweenness']. Default is METRICS.
+        """
+        self.metrics = list(metrics) if metrics is not None else self.METRICS
+
+
     def compute_metrics(self, graph: nx.DiGraph) -> dict:
         """
-        Computes all the metrics listed in METRICS for the provided graph.
+        Computes all the metrics listed in metrics for the provided graph.
         
         Parameters:
         -----------
@@ -40,13 +61,41 @@ class MetricCalculator():
             Dictionary with metric names as keys and computed values as associated values.
         """
         metric_results = {}
-        DECIMAL_POS = 5  # decimal precision
         
-        for metric in self.METRICS:
+        for metric in self.metrics:
             metric_function = getattr(self, metric)
-            metric_results[metric] = round(metric_function(graph), DECIMAL_POS)  
+            metric_results[metric] = round(metric_function(graph), self.DECIMAL_POS)  
         
         return metric_results
+
+
+    @classmethod
+    def degree_metrics(cls, n_nodes: int, n_edges: int) -> dict:
+        """
+        Returns the size, degree and density metrics of a graph from its number of nodes and edges, rounded
+        as in compute_metrics, for graphs kept as counters or alive masks instead of NetworkX graphs.
+        """
+        n = n_nodes
+        return {
+            'graph_size': n,
+            'avg_in_degree': round(n_edges / n, cls.DECIMAL_POS) if n else 0,
+            'avg_out_degree': round(n_edges / n, cls.DECIMAL_POS) if n else 0,
+            'avg_total_degree': round(2 * n_edges / n, cls.DECIMAL_POS) if n else 0,
+            'density': round(n_edges / (n * (n - 1)), cls.DECIMAL_POS) if n >= 2 else 0,
+        }
+
+
+    @classmethod
+    def compute_compact_metrics(cls, graph: CompactGraph, alive: np.ndarray) -> dict:
+        """
+        Computes the default metrics (and the largest weakly connected component) of the species given by the
+        alive mask, vectorized over the links of the CompactGraph.
+        """
+        links = alive[graph.consumers] & alive[graph.resources]
+        resources, consumers = graph.resources[links], graph.consumers[links]
+
+        n_components, largest = _weak_components(alive, resources, consumers)
+        return dict(cls.degree_metrics(int(alive.sum()), len(resources)), number_of_wccs=n_components, largest_wcc_size=largest)
     
 
     def graph_size(self, graph:nx.DiGraph) -> float:
@@ -73,11 +122,11 @@ class MetricCalculator():
     
 
     def largest_wcc_size(self, graph: nx.DiGraph) -> float:
-        return len(max(list(nx.weakly_connected_components(graph))))
+        return len(max(nx.weakly_connected_components(graph), key=len))
 
     
     def largest_ssc_size(self, graph: nx.DiGraph) -> float:
-        return len(max(list(nx.strongly_connected_components(graph))))
+        return len(max(nx.strongly_connected_components(graph), key=len))
     
 
     def number_of_wccs(self, graph: nx.DiGraph) -> float:
@@ -108,3 +157,23 @@ class MetricCalculator():
 
     def avg_trophic_level(self, graph: nx.DiGraph) -> float:
         return sum(dict(nx.trophic_levels(graph)).values()) / len(graph)
+
+
+def _weak_components(alive: np.ndarray, resources: np.ndarray, consumers: np.ndarray) -> tuple:
+    """
+    Returns the number of weakly connected components and the size of the largest, by propagating the smallest
+    species id along the links with pointer jumping until every component carries one label.
+    """
+    labels = np.arange(len(alive))
+    while True:
+        previous = labels.copy()
+        np.minimum.at(labels, resources, labels[consumers])
+        np.minimum.at(labels, consumers, labels[resources])
+        labels = labels[labels]
+        if np.array_equal(labels, previous):
+            break
+
+    alive_labels = labels[alive]
+    if len(alive_labels) == 0:
+        return 0, 0
+    return int(np.count_nonzero(alive_labels == np.flatnonzero(alive))), int(np.bincount(alive_labels).max())
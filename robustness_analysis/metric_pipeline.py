@@ -0,0 +1,109 @@
+from multiprocessing import Pool, cpu_count
+from metric_calculator import MetricCalculator
+from graph import Graph
+from worker_state import init_worker, worker_state
+import networkx as nx
+import numpy as np
+
+
+class MetricPipeline:
+    """
+    Computes the metrics of a perturbation asynchronously on a pool of metric workers.
+
+    Instead of blocking on compute_metrics at every step, the removal loop submits an immutable snapshot of
+    the graph (the alive mask of the species, packed into bits) and keeps going. The workers hold the initial
+    graph from their initializer, rebuild the graph of every snapshot and compute its metrics, while the results
+    are collected in step order at the end of the perturbation. This lets single, deterministic perturbations
+    (e.g. a sequential attack with k=1) use all cores.
+
+    Usage:
+        with MetricPipeline(graph) as pipeline:
+            perturbation = Perturbation(0, graph.copy(), save_nodes=False, metric_pipeline=pipeline)
+            perturbation.run()
+    """
+
+    def __init__(self, graph: Graph, processes: int = None, batch_size: int = 8) -> None:
+        """
+        Parameters:
+        -----------
+        graph : Graph
+            The initial graph of the perturbations, whose species ids index the snapshots.
+        processes : int, optional
+            Number of metric workers. Default is cpu_count().
+        batch_size : int, optional
+            Number of snapshots sent to a worker at once. Default is 8.
+        """
+        self.graph = graph
+        self.processes = processes or cpu_count()
+        self.batch_size = batch_size
+        self.pool = None
+        self.batch = []
+        self.pending = []
+
+
+    def __enter__(self) -> 'MetricPipeline':
+        self.start()
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop()
+
+
+    def start(self) -> None:
+        nx_graph = self.graph.nx_graph
+        index = self.graph.species_ids
+        edges = np.array([(index[resource], index[consumer]) for resource, consumer in nx_graph.edges], dtype=np.int64).reshape(-1, 2)
+        state = dict(species_names=self.graph.species_names, edges=edges, metric_calculator=MetricCalculator(self.graph.metric_calculator.metrics))
+        self.pool = Pool(processes=self.processes, initializer=init_worker, initargs=(state,))
+
+
+    def stop(self) -> None:
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+
+
+    def submit(self, alive: np.ndarray) -> None:
+        """
+        Queues the metrics of a snapshot, given as boolean alive mask over the species ids of the graph.
+        """
+        self.batch.append(np.packbits(alive))
+        if len(self.batch) == self.batch_size:
+            self._flush()
+
+
+    def _flush(self) -> None:
+        if self.batch:
+            self.pending.append(self.pool.apply_async(_compute_batch, (self.batch,)))
+            self.batch = []
+
+
+    def collect(self) -> list:
+        """
+        Waits for the metrics of all submitted snapshots and returns them in submission order.
+        """
+        self._flush()
+        results = [metrics for batch in self.pending for metrics in batch.get()]
+        self.pending = []
+        return results
+
+
+def _compute_batch(batch: list) -> list:
+    """
+    Rebuilds the graph of every snapshot of the batch and computes its metrics.
+    """
+    state = worker_state()
+    names, edges = state['species_names'], state['edges']
+
+    results = []
+    for packed in batch:
+        alive = np.unpackbits(packed, count=len(names)).astype(bool)
+        kept = edges[alive[edges[:, 0]] & alive[edges[:, 1]]]
+
+        nx_graph = nx.DiGraph()
+        nx_graph.add_nodes_from(names[alive])
+        nx_graph.add_edges_from(zip(names[kept[:, 0]], names[kept[:, 1]]))
+        results.append(state['metric_calculator'].compute_metrics(nx_graph))
+    return results
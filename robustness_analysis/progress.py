@@ -0,0 +1,210 @@
+import json
+import queue
+import threading
+import time
+
+import numpy as np
+
+
+class ProgressEmitter:
+    """
+    Worker side of the progress telemetry. Pushes structured progress events of one perturbation
+    into a queue shared with the parent process, at most once per interval.
+    """
+
+    def __init__(self, perturbation_id: str, event_queue, interval: float = 5.0) -> None:
+        """
+        Parameters:
+        -----------
+        perturbation_id : str
+            Identifier of the perturbation reporting its progress.
+        event_queue : Queue
+            Queue shared with the ProgressReporter, e.g. created with multiprocessing.Manager().Queue().
+        interval : float, optional
+            Minimum number of seconds between two progress events. Default is 5.0.
+        """
+        self.perturbation_id = perturbation_id
+        self.event_queue = event_queue
+        self.interval = interval
+        self.initial_size = 0
+        self.steps = 0
+        self._start = None
+        self._last_emit = None
+
+
+    def start(self, initial_size: int) -> None:
+        self.initial_size = initial_size
+        self._start = self._last_emit = time.time()
+        self._emit('started', initial_size)
+
+
+    def update(self, remaining: int) -> None:
+        """
+        Registers one perturbation step and emits a progress event if the interval has elapsed.
+        """
+        self.steps += 1
+        if time.time() - self._last_emit >= self.interval:
+            self._emit('progress', remaining)
+
+
+    def finish(self) -> None:
+        self._emit('finished', 0)
+
+
+    def _emit(self, event: str, remaining: int) -> None:
+        now = time.time()
+        elapsed = now - self._start
+        self.event_queue.put({
+            'event': event,
+            'id': self.perturbation_id,
+            'time': now,
+            'initial_size': self.initial_size,
+            'remaining': remaining,
+            'steps': self.steps,
+            'steps_per_second': self.steps / elapsed if elapsed > 0 else 0.0,
+        })
+        self._last_emit = now
+
+
+class ProgressReporter:
+    """
+    Parent side of the progress telemetry. Consumes the events pushed by the workers in a background
+    thread and periodically prints the aggregate throughput, the estimated time to completion and
+    the perturbations lagging behind the others (stragglers).
+
+    Attributes:
+    -----------
+    state : dict
+        Latest event received from every perturbation, by perturbation id.
+    """
+
+    def __init__(self, event_queue, k: int, report_interval: float = 10.0, log_path: str = None,
+                 straggler_ratio: float = 0.5, stall_timeout: float = 300.0) -> None:
+        """
+        Parameters:
+        -----------
+        event_queue : Queue
+            Queue the ProgressEmitters of the workers push their events into.
+        k : int
+            Total number of perturbations of the simulation.
+        report_interval : float, optional
+            Number of seconds between two printed reports. Default is 10.0.
+        log_path : str, optional
+            Path of a JSON lines file every received event is appended to. Default is None.
+        straggler_ratio : float, optional
+            A running perturbation is a straggler if its rate (steps per second since its own start) is below
+            this fraction of the median rate of the running perturbations. Perturbations which did not report
+            progress since they started have no rate yet and are only checked against stall_timeout. Default is 0.5.
+        stall_timeout : float, optional
+            A running perturbation is a straggler if it did not report for this many seconds. Default is 300.0.
+        """
+        self.event_queue = event_queue
+        self.k = k
+        self.report_interval = report_interval
+        self.log_path = log_path
+        self.straggler_ratio = straggler_ratio
+        self.stall_timeout = stall_timeout
+        self.state = {}
+        self._start = None
+        self._thread = None
+        self._log_file = None
+
+
+    def start(self) -> None:
+        self._start = time.time()
+        if self.log_path:
+            self._log_file = open(self.log_path, 'a')
+        self._thread = threading.Thread(target=self._consume, daemon=True)
+        self._thread.start()
+
+
+    def stop(self) -> None:
+        self.event_queue.put(None)
+        self._thread.join()
+        print(self.report())
+        if self._log_file:
+            self._log_file.close()
+
+
+    def _consume(self) -> None:
+        last_report = time.time()
+        while True:
+            try:
+                event = self.event_queue.get(timeout=self.report_interval)
+            except queue.Empty:
+                event = {}
+
+            if event is None:
+                return
+
+            if event:
+                self.state[event['id']] = event
+                if self._log_file:
+                    self._log_file.write(json.dumps(event) + "\n")
+                    self._log_file.flush()
+
+            if time.time() - last_report >= self.report_interval:
+                print(self.report())
+                last_report = time.time()
+
+
+    def summary(self) -> dict:
+        """
+        Returns the aggregate progress over all perturbations.
+        """
+        now = time.time()
+        elapsed = now - self._start
+        events = list(self.state.values())
+
+        initial_sizes = [event['initial_size'] for event in events]
+        expected_size = np.mean(initial_sizes) if initial_sizes else 0.0  # for perturbations which did not start yet
+        removed = sum(event['initial_size'] - event['remaining'] for event in events)
+        total_work = sum(initial_sizes) + expected_size * (self.k - len(events))
+
+        throughput = removed / elapsed if elapsed > 0 else 0.0
+        eta = (total_work - removed) / throughput if throughput > 0 else None
+
+        return {
+            'elapsed': elapsed,
+            'finished': sum(1 for event in events if event['event'] == 'finished'),
+            'running': sum(1 for event in events if event['event'] != 'finished'),
+            'species_removed': removed,
+            'species_per_second': throughput,
+            'steps_per_second': sum(event['steps_per_second'] for event in events if event['event'] != 'finished'),
+            'eta': eta,
+            'stragglers': self._stragglers(events, now),
+        }
+
+
+    def _stragglers(self, events: list, now: float) -> list:
+        running = [event for event in events if event['event'] != 'finished']
+        if not running:
+            return []
+
+        # Comparing rates instead of progress does not flag perturbations which started later than the others
+        rates = {event['id']: event['steps_per_second'] for event in running if event['event'] != 'started'}
+        median_rate = np.median(list(rates.values())) if rates else 0.0
+
+        return sorted(
+            event['id'] for event in running
+            if rates.get(event['id'], median_rate) < self.straggler_ratio * median_rate or now - event['time'] > self.stall_timeout
+        )
+
+
+    def report(self) -> str:
+        summary = self.summary()
+        eta = "unknown" if summary['eta'] is None else format_duration(summary['eta'])
+        line = (f">>> progress: {summary['finished']}/{self.k} perturbations finished, {summary['running']} running, "
+                f"{summary['species_per_second']:.1f} species/s, {summary['steps_per_second']:.1f} steps/s, eta {eta}")
+        if summary['stragglers']:
+            line += f", stragglers: {', '.join(summary['stragglers'])}"
+        return line
+
+
+def format_duration(seconds: float) -> str:
+    """
+    Formats a duration as hours:minutes:seconds, with as many hours as needed (e.g. 38:00:00).
+    """
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02}:{minutes:02}:{seconds:02}"
@@ -0,0 +1,260 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from collections import OrderedDict
+from threading import Lock, Thread
+from compact_graph import CompactGraph
+from dominator_tree import DominatorTree
+from metric_calculator import MetricCalculator
+from threshold_sweep import required_losses
+import numpy as np
+import json
+import time
+
+
+class WhatIfEngine:
+    """
+    Answers what-if queries on a resident food web: which species go extinct if some species disappear,
+    the metrics of the remaining web, and the outcome of simple attack scenarios.
+
+    The CompactGraph is never modified. Every query runs its cascade on a private overlay of prey loss counters
+    (copy-on-write: only the touched species get an entry), so queries are independent and can run concurrently.
+    Recent results are kept in an LRU cache keyed by the normalized query (removed species sorted and deduplicated).
+    """
+
+    ATTACKS = ('degree', 'dominator_cascade', 'random')
+
+    def __init__(self, graph: CompactGraph, cache_size: int = 256) -> None:
+        """
+        Parameters:
+        -----------
+        graph : CompactGraph
+            The prepared food web.
+        cache_size : int, optional
+            Number of query results kept in the cache. Default is 256.
+        """
+        self.graph = graph
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.lock = Lock()
+        self.rankings = {}
+        self.ranking_lock = Lock()
+        self.required = required_losses(graph.prey_count, 1.0)  # default threshold, others are computed per query
+
+
+    def query(self, kind: str, params: dict) -> dict:
+        """
+        Answers a 'cascade', 'metrics' or 'scenario' query, from the cache if it was asked recently.
+        """
+        handlers = {'cascade': self.cascade, 'metrics': self.metrics, 'scenario': self.scenario}
+        if kind not in handlers:
+            raise ValueError(f"Unknown query: {kind}")
+
+        if not isinstance(params, dict):
+            raise TypeError("The query must be a JSON object")
+        if isinstance(params.get('removed'), list):
+            params = dict(params, removed=sorted(set(params['removed'])))
+        key = (kind, json.dumps(params, sort_keys=True))
+        with self.lock:
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                return dict(self.cache[key], cached=True)
+
+        result = handlers[kind](**params)
+        with self.lock:
+            self.cache[key] = result
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return dict(result, cached=False)
+
+
+    def cascade(self, removed: list, threshold: float = 1.0) -> dict:
+        """
+        Returns the species which go extinct when the given species are removed from the intact web.
+
+        Parameters:
+        -----------
+        removed : list
+            Names of the removed species.
+        threshold : float, optional
+            Fraction of its prey a consumer must lose to go extinct, as Graph.extinction_threshold. Default is 1.0.
+        """
+        primary = self._species_ids(removed)
+        dead = self._cascade(primary, threshold)
+        names = self.graph.names
+        return {
+            'primary': [names[i] for i in primary],
+            'secondary': [names[i] for i in dead[len(primary):]],
+            'remaining': len(self.graph) - len(dead),
+        }
+
+
+    def metrics(self, removed: list, threshold: float = 1.0) -> dict:
+        """
+        Returns the metrics of the web remaining after the given species and their cascade are removed.
+        """
+        dead = self._cascade(self._species_ids(removed), threshold)
+        alive = np.ones(len(self.graph), dtype=bool)
+        alive[dead] = False
+        return dict(MetricCalculator.compute_compact_metrics(self.graph, alive), secondary=len(dead) - len(set(removed)))
+
+
+    def scenario(self, attack: str, k: int, seed: int = 0, threshold: float = 1.0) -> dict:
+        """
+        Removes k species chosen by an attack on the intact web at once and returns the cascade and remaining metrics.
+
+        Parameters:
+        -----------
+        attack : str
+            'degree' or 'dominator_cascade' remove the k highest ranked species, 'random' k uniformly drawn species.
+        k : int
+            Number of primary removals.
+        seed : int, optional
+            Seed of the random attack. Default is 0.
+        """
+        if attack not in self.ATTACKS:
+            raise ValueError(f"Unknown attack: {attack}, expected one of {self.ATTACKS}")
+        if not 0 <= k <= len(self.graph):
+            raise ValueError(f"k must be between 0 and {len(self.graph)}")
+
+        if attack == 'random':
+            primary = np.random.default_rng(seed).choice(len(self.graph), size=k, replace=False)
+        else:
+            primary = self._ranking(attack)[:k]
+
+        dead = self._cascade([int(i) for i in primary], threshold)
+        alive = np.ones(len(self.graph), dtype=bool)
+        alive[dead] = False
+        names = self.graph.names
+        return {
+            'primary': [names[i] for i in primary],
+            'secondary': [names[i] for i in dead[k:]],
+            'metrics': MetricCalculator.compute_compact_metrics(self.graph, alive),
+        }
+
+
+    def _species_ids(self, removed: list) -> list:
+        unknown = [name for name in removed if name not in self.graph.index]
+        if unknown:
+            raise ValueError(f"Unknown species: {unknown}")
+        return list(dict.fromkeys(self.graph.index[name] for name in removed))
+
+
+    def _cascade(self, primary: list, threshold: float) -> list:
+        """
+        Returns the primary removals followed by the species going extinct in their cascade, in extinction order.
+        """
+        if not 0 < threshold <= 1:
+            raise ValueError("The extinction threshold must be in (0, 1]")
+        required = self.required if threshold == 1.0 else required_losses(self.graph.prey_count, threshold)
+
+        dead_set = set(primary)
+        dead = list(primary)
+        lost = {}  # overlay of prey loss counters, the graph itself is shared by all queries
+        position = 0
+        while position < len(dead):
+            species = dead[position]
+            position += 1
+            for consumer in self.graph.consumers_of(species).tolist():
+                if consumer in dead_set:
+                    continue
+                lost[consumer] = lost.get(consumer, 0) + 1
+                if lost[consumer] >= required[consumer]:
+                    dead_set.add(consumer)
+                    dead.append(consumer)
+        return dead
+
+
+    def _ranking(self, attack: str) -> np.ndarray:
+        """
+        Returns the species ids sorted by decreasing attack metric on the intact web, computed once.
+        """
+        with self.ranking_lock:  # concurrent first queries compute the ranking once
+            if attack not in self.rankings:
+                if attack == 'degree':
+                    values = np.bincount(self.graph.consumers, minlength=len(self.graph)) + np.bincount(self.graph.resources, minlength=len(self.graph))
+                else:
+                    values = DominatorTree(self.graph).cascade_sizes
+                self.rankings[attack] = np.argsort(-values, kind='stable')
+            return self.rankings[attack]
+
+
+class QueryService:
+    """
+    Local HTTP service answering what-if queries from a WhatIfEngine, e.g. from a notebook or curl.
+
+    Endpoints (JSON bodies and responses):
+        GET  /health                                            species and link counts
+        POST /cascade   {"removed": [...], "threshold": 1.0}    secondary extinctions
+        POST /metrics   {"removed": [...], "threshold": 1.0}    metrics of the remaining web
+        POST /scenario  {"attack": "degree", "k": 5, "seed": 0} cascade and metrics of an attack
+
+    Only binds to localhost by default, the service has no authentication.
+    """
+
+    def __init__(self, engine: WhatIfEngine, host: str = '127.0.0.1', port: int = 8765) -> None:
+        self.engine = engine
+        self.server = ThreadingHTTPServer((host, port), _make_handler(engine))
+        self.thread = None
+
+
+    @property
+    def address(self) -> tuple:
+        return self.server.server_address
+
+
+    def serve_forever(self) -> None:
+        print(f">>> query service listening on http://{self.address[0]}:{self.address[1]}")
+        self.server.serve_forever()
+
+
+    def start(self) -> None:
+        """
+        Serves in a background thread, e.g. for tests on localhost.
+        """
+        self.thread = Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+        if self.thread is not None:
+            self.thread.join()
+
+
+def _make_handler(engine: WhatIfEngine) -> type:
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def do_GET(self) -> None:
+            if self.path == '/health':
+                self._respond(200, {'species': len(engine.graph), 'links': engine.graph.number_of_links()})
+            else:
+                self._respond(404, {'error': f"Unknown path: {self.path}"})
+
+
+        def do_POST(self) -> None:
+            start = time.perf_counter()
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                params = json.loads(self.rfile.read(length) or b'{}')
+                result = engine.query(self.path.strip('/'), params)
+            except (ValueError, TypeError) as error:  # includes invalid JSON and unexpected parameters
+                self._respond(400, {'error': str(error)})
+                return
+            result['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 3)
+            self._respond(200, result)
+
+
+        def _respond(self, status: int, body: dict) -> None:
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+
+        def log_message(self, format: str, *args) -> None:
+            pass  # one line per query would drown the console
+
+    return Handler
@@ -0,0 +1,203 @@
+from multiprocessing import Pool, cpu_count
+from compact_graph import CompactGraph
+from metric_calculator import MetricCalculator
+from perturbation import expand_metric_evolution
+from extinction_record import load_extinction_records, load_species_names
+from file_exporter import results_directory
+from worker_state import init_worker, worker_state
+import networkx as nx
+import numpy as np
+import pandas as pd
+import os
+
+
+# Metrics computed by inserting the species in reverse removal order instead of rebuilding every graph state
+INCREMENTAL_METRICS = {'graph_size', 'avg_in_degree', 'avg_out_degree', 'avg_total_degree', 'density', 'number_of_wccs', 'largest_wcc_size'}
+
+
+class Replay:
+    """
+    Computes new metrics for finished runs from their saved extinction records (save_nodes=True), without
+    attack strategies or cascades, and appends them as columns to the saved metric evolutions.
+
+    The graph state before every primary removal follows from the record: the species removed at a later step.
+    Degree, density and weakly connected component metrics are computed in one backwards pass, inserting the
+    species in reverse removal order with edge counters and a union-find. Any other MetricCalculator metric is
+    computed on the rebuilt graph states, which still skips the strategy setup and the sampling of the run.
+
+    Note: the graph must be the one the run started from (e.g. the processed metaweb), with the species
+    in the order of the saved name table.
+    """
+
+    def __init__(self, nx_graph: nx.DiGraph, metrics: list, directory: str = 'results', processes: int = None) -> None:
+        """
+        Parameters:
+        -----------
+        nx_graph : nx.DiGraph
+            The initial (reversed) NetworkX graph of the run, e.g. Graph.nx_graph before the simulation.
+        metrics : list
+            Names of the MetricCalculator metrics to compute, e.g. ['largest_wcc_size', 'avg_trophic_level'].
+        directory : str, optional
+            Results directory of the run. Default is 'results'.
+        processes : int, optional
+            Number of worker processes. Default is cpu_count().
+        """
+        unknown = [metric for metric in metrics if metric not in INCREMENTAL_METRICS and metric not in MetricCalculator.AVAILABLE_METRICS]
+        if unknown:
+            raise ValueError(f"Unknown metrics: {unknown}")
+
+        names = load_species_names(directory)
+        if len(names) != len(nx_graph) or any(name != node for name, node in zip(names, nx_graph)):
+            raise ValueError("The graph does not match the species name table of the run")
+
+        self.nx_graph = nx_graph
+        self.graph = CompactGraph.from_nx_graph(nx_graph)
+        self.metrics = list(metrics)
+        self.directory = directory
+        self.processes = processes or cpu_count()
+
+
+    def run(self) -> None:
+        """
+        Replays every perturbation of the results directory and appends the metrics to its metric evolution.
+        """
+        records = load_extinction_records(self.directory)
+        empty = [perturbation_id for perturbation_id, record in records.items() if len(record['step']) == 0]
+        if empty:
+            raise ValueError(f"The extinction records of perturbations {empty} are empty, there are no graph states to replay")
+        print(">>> replaying", len(records), "perturbations with", self.metrics)
+
+        with Pool(processes=self.processes, initializer=init_worker, initargs=(dict(nx_graph=self.nx_graph, graph=self.graph, metrics=self.metrics),)) as pool:
+            for perturbation_id, evolution in pool.imap_unordered(_replay_record, records.items()):
+                self._append(perturbation_id, evolution)
+
+        print(">>> the replay has successfully concluded, the metrics are appended to the results directory")
+
+
+    def _append(self, perturbation_id: str, evolution: dict) -> None:
+        """
+        Adds the metric columns to the saved metric evolution, replacing columns of the same name.
+        """
+        path = os.path.join(results_directory(self.directory), f'perturbation_{perturbation_id}')
+        results = pd.read_csv(path)
+        expanded = pd.DataFrame(expand_metric_evolution(evolution))
+        if len(expanded) != len(results):
+            raise ValueError(f"The extinction record of perturbation {perturbation_id} does not match its metric evolution")
+
+        for metric in self.metrics:
+            results[metric] = expanded[metric].to_numpy()
+        results.to_csv(path, index=False)
+
+
+def removal_steps(record: dict, n_species: int) -> np.ndarray:
+    """
+    Returns the step at which every species was removed, the number of steps for species which were never removed.
+    """
+    n_steps = int(record['step'].max()) + 1 if len(record['step']) else 0
+    steps = np.full(n_species, n_steps, dtype=np.int64)
+    steps[record['species']] = record['step']
+    return steps
+
+
+def replay_incremental(graph: CompactGraph, steps: np.ndarray, n_steps: int) -> dict:
+    """
+    Computes the incremental metrics before every primary removal, inserting the species in reverse removal order.
+
+    Parameters:
+    -----------
+    graph : CompactGraph
+        The initial food web.
+    steps : np.ndarray
+        Removal step of every species, as returned by removal_steps.
+    n_steps : int
+        Number of primary removals.
+
+    Returns:
+    --------
+    dict
+        The value of every incremental metric at every step.
+    """
+    parent = list(range(len(graph)))  # lists, the union-find accesses single elements
+    size = [1] * len(graph)
+    present = [False] * len(graph)
+
+    def find(node: int) -> int:
+        root = node
+        while parent[root] != root:
+            root = parent[root]
+        while parent[node] != root:  # path compression
+            parent[node], node = root, parent[node]
+        return root
+
+    n_nodes, n_edges, n_components, largest = 0, 0, 0, 0
+    values = {metric: [0] * n_steps for metric in INCREMENTAL_METRICS}
+
+    order = np.argsort(-steps, kind='stable')
+    position = 0
+    for step in range(int(steps.max()) if len(steps) else 0, -1, -1):
+        # Insert the species removed at this step (and first the ones never removed)
+        while position < len(order) and steps[order[position]] >= step:
+            species = int(order[position])
+            position += 1
+            present[species] = True
+            n_nodes += 1
+            n_components += 1
+            largest = max(largest, 1)
+
+            neighbors = [prey for prey in graph.prey(species).tolist() if present[prey]]
+            neighbors += [consumer for consumer in graph.consumers_of(species).tolist() if present[consumer] and consumer != species]
+            n_edges += len(neighbors)
+            for neighbor in neighbors:
+                root, other = find(species), find(neighbor)
+                if root != other:
+                    if size[root] < size[other]:
+                        root, other = other, root
+                    parent[other] = root
+                    size[root] += size[other]
+                    n_components -= 1
+                    largest = max(largest, size[root])
+
+        if step < n_steps:
+            for metric, value in MetricCalculator.degree_metrics(n_nodes, n_edges).items():
+                values[metric][step] = value
+            values['number_of_wccs'][step] = n_components
+            values['largest_wcc_size'][step] = largest
+
+    return values
+
+
+def replay_states(nx_graph: nx.DiGraph, steps: np.ndarray, n_steps: int, metrics: list) -> dict:
+    """
+    Computes the given MetricCalculator metrics on the graph state before every primary removal,
+    removing the species of every step from a copy of the graph.
+    """
+    calculator = MetricCalculator(metrics)
+    names = np.array(list(nx_graph.nodes), dtype=object)
+    state = nx_graph.copy()
+    order = np.argsort(steps, kind='stable')
+
+    values = {metric: [] for metric in metrics}
+    position = 0
+    for step in range(n_steps):
+        for metric, value in calculator.compute_metrics(state).items():
+            values[metric].append(value)
+        end = np.searchsorted(steps[order], step, side='right')
+        state.remove_nodes_from(names[order[position:end]])
+        position = end
+    return values
+
+
+def _replay_record(item: tuple) -> tuple:
+    perturbation_id, record = item
+    state = worker_state()
+    graph = state['graph']
+
+    n_steps = int(record['step'].max()) + 1
+    steps = removal_steps(record, len(graph))
+
+    evolution = replay_incremental(graph, steps, n_steps)  # always provides graph_size for the expansion
+    evolution = {metric: values for metric, values in evolution.items() if metric in state['metrics'] or metric == 'graph_size'}
+    other_metrics = [metric for metric in state['metrics'] if metric not in INCREMENTAL_METRICS]
+    if other_metrics:
+        evolution.update(replay_states(state['nx_graph'], steps, n_steps, other_metrics))
+    return perturbation_id, evolution
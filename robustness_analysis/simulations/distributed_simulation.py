@@ -0,0 +1,87 @@
+import sys
+sys.path.append('../')
+
+import argparse
+import os
+import secrets
+from multiprocessing import Process
+from graph import Graph
+from metaweb import Metaweb, MetawebProcessor
+from attack_strategy import Random
+from metaweb import ProcessingStrategy
+from distributed import Coordinator, run_worker
+import constants
+
+"""
+Runs the random simulation with a coordinator handing out perturbations to workers on any machine.
+
+On the machine holding the data:
+    python distributed_simulation.py coordinator --host 0.0.0.0 --port 6000 --k 1000 --local-workers 8
+
+On every other machine, with the key printed by the coordinator:
+    FOODWEB_AUTHKEY=<key> python distributed_simulation.py worker --host <coordinator host> --port 6000
+
+The connections unpickle what they receive, so anyone holding the key can run code on the coordinator
+and the workers. Keep the key secret and only listen on trusted networks.
+"""
+
+AUTHKEY_ENV = 'FOODWEB_AUTHKEY'
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Distributed robustness simulation.")
+    parser.add_argument('mode', choices=['coordinator', 'worker'])
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=6000)
+    parser.add_argument('--authkey', default=os.environ.get(AUTHKEY_ENV),
+                        help=f"secret key shared by the coordinator and its workers, default ${AUTHKEY_ENV}. "
+                             "The coordinator generates and prints one if none is given")
+    parser.add_argument('--k', type=int, default=3, help="number of perturbations")
+    parser.add_argument('--local-workers', type=int, default=0, help="number of workers started next to the coordinator")
+    parser.add_argument('--lease-timeout', type=float, default=3600.0, help="seconds before an unfinished task is handed out again")
+    parser.add_argument('--cache-dir', default=None, help="directory workers cache the prepared graphs in")
+    args = parser.parse_args()
+
+    if args.authkey is None:
+        if args.mode == 'worker':
+            parser.error(f"workers need the key of the coordinator, pass --authkey or set ${AUTHKEY_ENV}")
+        args.authkey = secrets.token_hex(16)
+        print(f">>> generated authkey, start the workers with {AUTHKEY_ENV}={args.authkey}")
+    authkey = args.authkey.encode()
+
+    if args.mode == 'worker':
+        run_worker((args.host, args.port), authkey, args.cache_dir)
+        sys.exit()
+
+    print(">>> setting up simulation")
+
+    ##### setup edges #####
+
+    metaweb_processor = MetawebProcessor(constants.ALL_SPECIES_AND_FOOD_GROUPS, constants.SPECIES_FOR_RANDOMIZED_LINKS)
+    metaweb = Metaweb(constants.FOODWEB_02, usecols=[constants.SOURCE_COL, constants.TARGET_COL])
+
+    # user TODO: set strategy: ProcessingStrategy = USE_AS_IS, REMOVE, GENERATE_AND_REMOVE
+
+    metaweb.setup(strategy=ProcessingStrategy.USE_AS_IS, data_processor=metaweb_processor)
+    edge_df = metaweb.get_edges()
+
+    ##### setup graph #####
+
+    attack_strategy = Random()
+    graph = Graph(attack_strategy, edge_df, source=constants.SOURCE_COL, target=constants.TARGET_COL)
+    graph.setup_attack_strategy()
+
+    ##### run simulation #####
+
+    coordinator = Coordinator((args.host, args.port), authkey, lease_timeout=args.lease_timeout)
+    coordinator.add_scenario('random', graph, k=args.k, save_nodes=True)
+
+    workers = [Process(target=run_worker, args=(coordinator.address, authkey, args.cache_dir)) for _ in range(args.local_workers)]
+    for worker in workers:
+        worker.start()
+
+    coordinator.run()
+
+    for worker in workers:
+        worker.join()
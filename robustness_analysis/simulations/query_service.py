@@ -0,0 +1,44 @@
+import sys
+sys.path.append('../')
+
+from compact_graph import CompactGraph
+from metaweb import Metaweb, MetawebProcessor
+from metaweb import ProcessingStrategy
+from query_service import WhatIfEngine, QueryService
+import constants
+
+"""
+Keeps the processed metaweb in memory and answers what-if queries on http://127.0.0.1:8765, e.g.
+
+    curl -X POST localhost:8765/cascade -d '{"removed": ["Vulpes vulpes"]}'
+    curl -X POST localhost:8765/metrics -d '{"removed": ["Vulpes vulpes"], "threshold": 0.5}'
+    curl -X POST localhost:8765/scenario -d '{"attack": "dominator_cascade", "k": 10}'
+
+Every query starts from the intact web, recent results are cached. Stop the service with Ctrl+C.
+"""
+
+
+if __name__ == "__main__":
+
+    print(">>> setting up query service")
+
+    ##### setup edges #####
+
+    metaweb_processor = MetawebProcessor(constants.ALL_SPECIES_AND_FOOD_GROUPS, constants.SPECIES_FOR_RANDOMIZED_LINKS)
+    metaweb = Metaweb(constants.FOODWEB_02, usecols=[constants.SOURCE_COL, constants.TARGET_COL])
+
+    # user TODO: set strategy: ProcessingStrategy = USE_AS_IS, REMOVE, GENERATE_AND_REMOVE
+
+    metaweb.setup(strategy=ProcessingStrategy.USE_AS_IS, data_processor=metaweb_processor)
+    edge_df = metaweb.get_edges()
+
+    ##### serve graph #####
+
+    # user TODO: optionally set port: int, cache_size: int = number of cached query results
+
+    graph = CompactGraph.from_edge_df(edge_df, source=constants.SOURCE_COL, target=constants.TARGET_COL)
+    service = QueryService(WhatIfEngine(graph, cache_size=256), port=8765)
+    try:
+        service.serve_forever()
+    except KeyboardInterrupt:
+        service.stop()
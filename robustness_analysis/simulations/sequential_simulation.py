@@ -35,6 +35,7 @@ if __name__ == "__main__":
     ##### run simulation #####
 
     # user TODO: set save_nodes: bool = whether to track primary removals
+    # the single perturbation runs in this process, while all cores compute its metrics (pipeline=True)
 
-    simulation = Simulation(graph, 1, save_nodes=True)
+    simulation = Simulation(graph, 1, save_nodes=True, pipeline=True)
     simulation.run()
\ No newline at end of file
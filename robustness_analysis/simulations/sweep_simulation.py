@@ -0,0 +1,40 @@
+import sys
+sys.path.append('../')
+
+import argparse
+from metaweb import ProcessingStrategy
+from sweep import SweepRunner, scenario_grid, habitat_combinations
+import constants
+
+"""
+Runs a grid of scenarios as one job, sharing the preprocessing and one pool of workers.
+
+Examples:
+    # all 15 combinations of threatened habitats
+    python sweep_simulation.py --habitat-combinations Wetland Cropland Aquatic Grassland --k 1000
+
+    # sequential attacks on the raw and the randomized metaweb
+    python sweep_simulation.py --sort-by DEGREE BETWEENNESS --processing USE_AS_IS REMOVE
+"""
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Sweep over a grid of simulation scenarios.")
+    parser.add_argument('--processing', nargs='+', default=[ProcessingStrategy.USE_AS_IS.value], choices=[strategy.value for strategy in ProcessingStrategy])
+    parser.add_argument('--random', action='store_true', help="include the random attack")
+    parser.add_argument('--greedy', action='store_true', help="include the greedy worst-case attack")
+    parser.add_argument('--sort-by', nargs='*', default=[], help="Sequential.SortBy metrics, e.g. DEGREE BETWEENNESS")
+    parser.add_argument('--habitats', nargs='+', action='append', default=[], help="one set of threatened habitats, can be repeated")
+    parser.add_argument('--habitat-combinations', nargs='*', default=[], help="sweep all combinations of these threatened habitats")
+    parser.add_argument('--k', type=int, default=3, help="number of perturbations per scenario")
+    parser.add_argument('--save-nodes', action='store_true', help="track the removed nodes")
+    parser.add_argument('--processes', type=int, default=None, help="number of worker processes")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    habitat_sets = args.habitats + habitat_combinations(args.habitat_combinations)
+    scenarios = scenario_grid([ProcessingStrategy(strategy) for strategy in args.processing], args.random, args.sort_by, habitat_sets, args.greedy)
+
+    sweep = SweepRunner(scenarios, k=args.k, foodweb=constants.FOODWEB_02, save_nodes=args.save_nodes, processes=args.processes, seed=args.seed)
+    sweep.run()
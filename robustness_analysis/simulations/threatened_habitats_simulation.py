@@ -10,7 +10,8 @@ import constants
 from file_exporter import export
 
 """
-Copy paste combinations for each simulation.
+Copy paste combinations for each simulation, or run all of them as one job with
+    python sweep_simulation.py --habitat-combinations Wetland Cropland Aquatic Grassland
 
 threatened_habitats = ['Wetland']
 threatened_habitats = ['Cropland']
@@ -1 +1,48 @@
-# needs implementation in AttackStrategy before being set up
\ No newline at end of file
+import sys
+sys.path.append('../')
+
+from graph import Graph
+from metaweb import Metaweb, MetawebProcessor
+from attack_strategy import ThreatenedSpecies
+from metaweb import ProcessingStrategy
+from simulation import Simulation
+import constants
+
+"""
+Removes species with probabilities weighted by their Red List category (CR, EN, VU, NT, LC),
+read from constants.THREATENED_SPECIES (Taxon and Category columns).
+Species which are not listed are weighted as least concern.
+
+Any other per-species weight column can be used with
+    WeightedAttack.from_column(species_df, 'Weight')
+"""
+
+
+if __name__ == "__main__":
+
+    print(">>> setting up simulation")
+
+    ##### setup edges #####
+
+    metaweb_processor = MetawebProcessor(constants.ALL_SPECIES_AND_FOOD_GROUPS, constants.SPECIES_FOR_RANDOMIZED_LINKS)
+    metaweb = Metaweb(constants.FOODWEB_02, usecols=[constants.SOURCE_COL, constants.TARGET_COL])
+
+    # user TODO: set strategy: ProcessingStrategy = USE_AS_IS, REMOVE, GENERATE_AND_REMOVE
+
+    metaweb.setup(strategy=ProcessingStrategy.USE_AS_IS, data_processor=metaweb_processor)
+    edge_df = metaweb.get_edges()
+
+    ##### setup graph #####
+
+    # user TODO: optionally set category_weights: dict = weight of every Red List category
+
+    attack_strategy = ThreatenedSpecies()
+    graph = Graph(attack_strategy, edge_df, source=constants.SOURCE_COL, target=constants.TARGET_COL)
+    graph.setup_attack_strategy()
+
+    ##### run simulation #####
+
+    # user TODO: set k: int = number of simulations, set save_nodes: bool = whether to track primary removals
+
+    simulation = Simulation(graph, k=1000, save_nodes=True)
+    simulation.run()
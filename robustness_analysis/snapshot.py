@@ -0,0 +1,72 @@
+from graph import Graph
+from attack_strategy import AttackStrategy
+from extinction_record import ExtinctionRecord
+import networkx as nx
+import numpy as np
+import copy
+
+
+class PerturbationSnapshot:
+    """
+    Compact state of a perturbation after a prefix of removals, from which continuations can be forked
+    without replaying the prefix.
+
+    Attributes:
+    -----------
+    step : int
+        Number of primary removals of the prefix.
+    alive : np.ndarray
+        Packed alive mask over the species ids of the initial graph.
+    n_species : int
+        Number of species of the initial graph.
+    extinction_threshold : float
+        Extinction threshold of the graph.
+    metric_evolution : dict
+        Metrics computed during the prefix.
+    extinction_record : ExtinctionRecord
+        Extinctions of the prefix, None if the prefix did not save the nodes.
+    attack_strategy : AttackStrategy
+        Copy of the attack strategy of the prefix, in its state after the last removal.
+    """
+
+    def __init__(self, step: int, alive: np.ndarray, extinction_threshold: float, metric_evolution: dict,
+                 extinction_record: ExtinctionRecord, attack_strategy: AttackStrategy) -> None:
+        self.step = step
+        self.alive = np.packbits(alive)
+        self.n_species = len(alive)
+        self.extinction_threshold = extinction_threshold
+        self.metric_evolution = copy.deepcopy(metric_evolution)
+        self.extinction_record = copy.deepcopy(extinction_record)
+        self.attack_strategy = copy.deepcopy(attack_strategy)
+
+
+    def alive_mask(self) -> np.ndarray:
+        return np.unpackbits(self.alive, count=self.n_species).astype(bool)
+
+
+    def restore_graph(self, base_nx_graph: nx.DiGraph, attack_strategy: AttackStrategy = None) -> Graph:
+        """
+        Rebuilds the graph of the snapshot from the initial graph of the prefix.
+
+        Parameters:
+        -----------
+        base_nx_graph : nx.DiGraph
+            The initial (reversed) NetworkX graph of the prefix, which is not modified.
+        attack_strategy : AttackStrategy, optional
+            Attack strategy of the continuation, set up on the restored graph. Default is None,
+            continuing with the strategy of the prefix.
+
+        Returns:
+        --------
+        Graph
+            The graph after the prefix, with the species ids and prey counts of the initial graph.
+        """
+        if len(base_nx_graph) != self.n_species:
+            raise ValueError("The base graph is not the initial graph of the snapshot")
+
+        strategy = copy.deepcopy(self.attack_strategy) if attack_strategy is None else attack_strategy
+        graph = Graph.from_nx_graph(strategy, base_nx_graph.copy(), self.extinction_threshold)
+        graph.nx_graph.remove_nodes_from(graph.species_names[~self.alive_mask()])
+        if attack_strategy is not None:
+            graph.setup_attack_strategy()
+        return graph
@@ -0,0 +1,228 @@
+from multiprocessing import Pool, cpu_count
+from itertools import combinations
+from perturbation import Perturbation
+from graph import Graph
+from metaweb import Metaweb, MetawebProcessor, ProcessingStrategy
+from attack_strategy import AttackStrategy, Random, Sequential, ThreatenedHabitats, GreedyCascade
+from file_exporter import export, export_arrays, export_json
+from extinction_record import export_species_names
+from simulation import remove_results_dir
+from worker_state import init_worker, worker_state, seed_random
+import pandas as pd
+import numpy as np
+import constants
+import copy
+import zlib
+import os
+
+
+class Scenario:
+    """
+    One cell of a sweep grid: a metaweb processing strategy combined with an attack strategy.
+
+    Attributes:
+    -----------
+    processing : ProcessingStrategy
+        Strategy used to process the metaweb before building the graph.
+    attack : str
+        One of 'random', 'sequential', 'threatened_habitats' or 'greedy_cascade'.
+    sort_by : str
+        Name of the Sequential.SortBy metric, for sequential attacks.
+    habitats : list
+        Threatened habitats, for threatened_habitats attacks.
+    """
+
+    def __init__(self, processing: ProcessingStrategy, attack: str, sort_by: str = None, habitats: list = None) -> None:
+        self.processing = processing
+        self.attack = attack
+        self.sort_by = sort_by
+        self.habitats = habitats
+
+
+    @property
+    def tag(self) -> str:
+        """
+        Name of the scenario, used as subdirectory of the results directory.
+        """
+        if self.attack == 'sequential':
+            return f"{self.processing.value}-sequential-{self.sort_by}"
+        if self.attack == 'threatened_habitats':
+            return f"{self.processing.value}-threatened_habitats-{'+'.join(self.habitats)}"
+        return f"{self.processing.value}-{self.attack}"
+
+
+    def create_attack_strategy(self, species_df: pd.DataFrame) -> AttackStrategy:
+        if self.attack == 'random':
+            return Random()
+        if self.attack == 'sequential':
+            return Sequential(metric=getattr(Sequential.SortBy, self.sort_by))
+        if self.attack == 'threatened_habitats':
+            return ThreatenedHabitats(self.habitats, species_df=species_df)
+        if self.attack == 'greedy_cascade':
+            return GreedyCascade()
+        raise ValueError(f"Unknown attack: {self.attack}")
+
+
+    def to_dict(self) -> dict:
+        return {'tag': self.tag, 'processing': self.processing.value, 'attack': self.attack, 'sort_by': self.sort_by, 'habitats': self.habitats}
+
+
+def scenario_grid(processing: list, random_attack: bool = False, sort_by: list = (), habitat_sets: list = (), greedy_attack: bool = False) -> list:
+    """
+    Returns the scenarios of a grid: every processing strategy combined with every attack.
+
+    Parameters:
+    -----------
+    processing : list
+        ProcessingStrategy values to sweep.
+    random_attack : bool, optional
+        Whether to include the random attack. Default is False.
+    sort_by : list, optional
+        Names of Sequential.SortBy metrics to sweep, e.g. ['DEGREE', 'BETWEENNESS'].
+    habitat_sets : list, optional
+        Lists of threatened habitats to sweep.
+    greedy_attack : bool, optional
+        Whether to include the greedy worst-case attack. Default is False.
+    """
+    attacks = [('random', None, None)] if random_attack else []
+    attacks += [('sequential', metric, None) for metric in sort_by]
+    attacks += [('threatened_habitats', None, list(habitats)) for habitats in habitat_sets]
+    attacks += [('greedy_cascade', None, None)] if greedy_attack else []
+    return [Scenario(strategy, attack, metric, habitats) for strategy in processing for attack, metric, habitats in attacks]
+
+
+def habitat_combinations(habitats: list) -> list:
+    """
+    Returns all non-empty combinations of the given habitats, e.g. the 15 combinations of 4 habitats.
+    """
+    return [list(combination) for size in range(1, len(habitats) + 1) for combination in combinations(habitats, size)]
+
+
+class SweepRunner:
+    """
+    Runs a grid of scenarios as one job. The csv files are read once, one graph is built per metaweb
+    processing strategy and the attack strategies are set up once per scenario. The prepared data is
+    handed to one persistent pool, whose workers run the perturbations of all scenarios interleaved.
+
+    Note: REMOVE and GENERATE_AND_REMOVE draw one randomized metaweb, shared by all scenarios using it.
+    The metaweb of every processing strategy and the perturbations of every scenario are seeded with seeds
+    derived from the sweep seed and their name, so results do not depend on the other scenarios of the grid.
+    """
+
+    def __init__(self, scenarios: list, k: int, foodweb: str = constants.FOODWEB_02, save_nodes: bool = False,
+                 results_dir: str = 'results', processes: int = None, seed: int = 0) -> None:
+        """
+        Parameters:
+        -----------
+        scenarios : list
+            Scenarios to run, e.g. created with scenario_grid.
+        k : int
+            Number of perturbations per scenario.
+        foodweb : str, optional
+            Path of the metaweb csv file. Default is constants.FOODWEB_02.
+        save_nodes : bool, optional
+            Whether to track the removed nodes. Default is False.
+        results_dir : str, optional
+            Directory the results are written to, one subdirectory per scenario. Default is 'results'.
+        processes : int, optional
+            Number of worker processes. Default is cpu_count().
+        seed : int, optional
+            Seed of the sweep. The processing of the metaweb uses derive_seed(seed, processing.value), and
+            perturbation i of a scenario derive_seed(seed, scenario.tag) + i. Default is 0.
+        """
+        self.scenarios = scenarios
+        self.k = k
+        self.foodweb = foodweb
+        self.save_nodes = save_nodes
+        self.results_dir = results_dir
+        self.processes = processes or cpu_count()
+        self.seed = seed
+
+
+    def prepare(self) -> tuple:
+        """
+        Builds the base graph of every processing strategy and sets up the attack strategy of every scenario.
+
+        Returns:
+        --------
+        tuple
+            The base NetworkX graphs by processing strategy and the set up attack strategies by scenario index.
+        """
+        print(">>> preparing", len(self.scenarios), "scenarios")
+        metaweb_processor = MetawebProcessor(constants.ALL_SPECIES_AND_FOOD_GROUPS, constants.SPECIES_FOR_RANDOMIZED_LINKS)
+        metaweb = Metaweb(self.foodweb, usecols=[constants.SOURCE_COL, constants.TARGET_COL])
+        species_df = pd.read_csv(constants.ALL_SPECIES_AND_FOOD_GROUPS, usecols=['Taxon', 'Habitat'])
+
+        base_graphs = {}
+        used = {scenario.processing for scenario in self.scenarios}
+        for processing in [strategy for strategy in ProcessingStrategy if strategy in used]:  # declaration order
+            seed_random(derive_seed(self.seed, processing.value))
+
+            processed_metaweb = metaweb.copy()
+            processed_metaweb.setup(strategy=processing, data_processor=metaweb_processor)
+            graph = Graph(Random(), processed_metaweb.get_edges(), source=constants.SOURCE_COL, target=constants.TARGET_COL)
+            base_graphs[processing] = graph.nx_graph
+
+        attack_strategies = {}
+        for i, scenario in enumerate(self.scenarios):
+            attack_strategy = scenario.create_attack_strategy(species_df)
+            attack_strategy.setup_attack_strategy(base_graphs[scenario.processing])
+            attack_strategies[i] = attack_strategy
+
+        return base_graphs, attack_strategies
+
+
+    def run(self) -> None:
+        """
+        Runs k perturbations of every scenario, interleaving the scenarios so that all of them progress together.
+        """
+        base_graphs, attack_strategies = self.prepare()
+
+        remove_results_dir(self.results_dir)
+        export_json({'k': self.k, 'scenarios': [scenario.to_dict() for scenario in self.scenarios]}, 'scenarios', directory=self.results_dir)
+        if self.save_nodes:
+            for scenario in self.scenarios:
+                species_names = Graph.from_nx_graph(None, base_graphs[scenario.processing]).species_names
+                export_species_names(species_names, directory=os.path.join(self.results_dir, scenario.tag))
+
+        tasks = [(i, perturbation_id) for perturbation_id in range(self.k) for i in range(len(self.scenarios))]
+        processing = {i: scenario.processing for i, scenario in enumerate(self.scenarios)}
+        tags = {i: scenario.tag for i, scenario in enumerate(self.scenarios)}
+        seeds = {i: derive_seed(self.seed, scenario.tag) for i, scenario in enumerate(self.scenarios)}
+
+        print(">>> sweep started with", len(tasks), "perturbations")
+        # The prepared data is installed in every worker once, so that tasks only carry the scenario and perturbation ids
+        state = dict(base_graphs=base_graphs, attack_strategies=attack_strategies, processing=processing, tags=tags,
+                     save_nodes=self.save_nodes, results_dir=self.results_dir, seeds=seeds)
+        with Pool(processes=self.processes, initializer=init_worker, initargs=(state,)) as pool:
+            for count, (tag, perturbation_id) in enumerate(pool.imap_unordered(_run_task, tasks), start=1):
+                print(f">>> {count}/{len(tasks)} perturbations done ({tag} {perturbation_id:04})")
+
+        print(">>> the sweep has successfully concluded, all perturbations are saved in the results directory")
+
+
+def derive_seed(seed: int, name: str) -> int:
+    """
+    Returns a seed derived from the sweep seed and a name (e.g. a scenario tag), stable across runs and processes.
+    """
+    return int(np.random.SeedSequence([seed, zlib.crc32(name.encode())]).generate_state(1)[0])
+
+
+def _run_task(task: tuple) -> tuple:
+    scenario_index, perturbation_id = task
+    state = worker_state()
+    seed_random(state['seeds'][scenario_index] + perturbation_id)
+
+    nx_graph = state['base_graphs'][state['processing'][scenario_index]].copy()
+    attack_strategy = copy.deepcopy(state['attack_strategies'][scenario_index])
+    graph = Graph.from_nx_graph(attack_strategy, nx_graph)
+
+    perturbation = Perturbation(perturbation_id, graph, state['save_nodes'])
+    perturbation.run()
+
+    tag = state['tags'][scenario_index]
+    directory = os.path.join(state['results_dir'], tag)
+    export(perturbation.get_metric_evolution(), f'perturbation_{perturbation.id}', directory=directory)
+    if perturbation.save_nodes:
+        export_arrays(perturbation.get_extinction_record(), f'extinctions_{perturbation.id}', directory=directory)
+    return tag, perturbation_id
@@ -0,0 +1,69 @@
+import importlib.abc
+import importlib.util
+import os
+import sys
+
+"""
+Makes the modules of robustness_analysis importable from the tests the way they import each other,
+e.g. `from graph import Graph`, also on case-sensitive file systems where Graph.py is not found as graph.
+"""
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PACKAGE_DIR)
+sys.path.insert(0, os.path.join(PACKAGE_DIR, 'benchmarks'))
+
+
+class _LowercaseModuleFinder(importlib.abc.MetaPathFinder):
+
+    def __init__(self, directory: str) -> None:
+        self.modules = {filename[:-3].lower(): os.path.join(directory, filename)
+                        for filename in os.listdir(directory) if filename.endswith('.py') and filename != filename.lower()}
+
+
+    def find_spec(self, name, path, target=None):
+        if path is None and name in self.modules:
+            return importlib.util.spec_from_file_location(name, self.modules[name])
+        return None
+
+
+if importlib.util.find_spec('graph') is None:
+    sys.meta_path.append(_LowercaseModuleFinder(PACKAGE_DIR))
+
+import pytest  # noqa: E402
+import pandas as pd  # noqa: E402
+from food_web_generator import FoodWebModel, generate_food_web, species_names, to_edge_df  # noqa: E402
+
+
+SOURCE, TARGET = 'source', 'target'
+
+
+@pytest.fixture
+def niche_web():
+    """
+    Returns a function creating the edge list of a seeded niche-model web, consumers as source and resources as target.
+    """
+    def create(n_species: int = 60, links_per_species: float = 4.0, seed: int = 0):
+        consumers, resources = generate_food_web(FoodWebModel.NICHE, n_species, links_per_species, seed)
+        return to_edge_df(consumers, resources, species_names(n_species), SOURCE, TARGET)
+    return create
+
+
+@pytest.fixture
+def metaweb_processor(tmp_path):
+    """
+    Returns a function creating a MetawebProcessor from small node lists: forest insects on the ground,
+    and spiders of the given habitat which generate links to them, alternately generalised and restricted.
+    """
+    from metaweb import MetawebProcessor
+
+    def create(n_insects: int = 40, n_spiders: int = 6, spider_habitat: str = 'Forest'):
+        ranks = dict(Kingdom='Animalia', Phylum='Arthropoda', Order='Order', Family='Family', Genus='Genus', Rank='Species')
+        insects = pd.DataFrame([dict(ranks, Class='Insecta', Taxon=f'insect_{i}', Habitat='Forest; Grassland', Zone='On ground')
+                                for i in range(n_insects)])
+        spiders = pd.DataFrame([dict(Diet_Range='Generalised' if i % 2 == 0 else 'Restricted', Taxon=f'spider_{i}', Zone='On ground',
+                                     Habitat=spider_habitat, Diet_Name='Insecta', Diet_Rank='Class') for i in range(n_spiders)])
+        all_species, rand_link_species = tmp_path / 'all_species.csv', tmp_path / 'rand_link_species.csv'
+        insects.to_csv(all_species, index=False)
+        spiders.to_csv(rand_link_species, index=False)
+        return MetawebProcessor(str(all_species), str(rand_link_species))
+    return create
@@ -0,0 +1,63 @@
+import random
+
+import pandas as pd
+import pytest
+
+from graph import Graph
+from attack_strategy import Random, ThreatenedHabitats, GreedyCascade
+from food_web_generator import FoodWebModel, generate_food_web, species_names, to_edge_df
+from conftest import SOURCE, TARGET
+
+
+def habitat_graph(niche_web):
+    graph = Graph(Random(), niche_web(40), source=SOURCE, target=TARGET)
+    species = list(graph.nx_graph)
+    species_df = pd.DataFrame({'Taxon': species, 'Habitat': ['Forest' if i % 2 else 'Forest;Wetland' for i in range(len(species))]})
+    return graph, species_df
+
+
+def test_threatened_habitats_strategies_sharing_a_graph_keep_their_buckets(niche_web):
+    graph, species_df = habitat_graph(niche_web)
+    forest = ThreatenedHabitats(['Forest'], species_df=species_df)
+    wetland = ThreatenedHabitats(['Wetland'], species_df=species_df)
+    forest.setup_attack_strategy(graph.nx_graph)
+    wetland.setup_attack_strategy(graph.nx_graph)
+
+    forest_only = [node for node in graph.nx_graph if graph.nx_graph.nodes[node]['Habitat'] == ['Forest']]
+    assert all(forest.node_buckets[node] == '1.0' for node in forest_only)
+    assert all(wetland.node_buckets[node] == '0.0' for node in forest_only)
+
+
+def test_threatened_habitats_skips_empty_buckets(niche_web):
+    graph, species_df = habitat_graph(niche_web)
+    strategy = ThreatenedHabitats(['Wetland'], species_df=species_df)
+    strategy.setup_attack_strategy(graph.nx_graph)
+
+    mixed = [node for node in graph.nx_graph if strategy.node_buckets[node] == '0.5']
+    graph.nx_graph.remove_nodes_from(mixed)
+    strategy.buckets = {'0.5': 1 - 1e-9, '0.0': 1e-9}
+
+    random.seed(0)
+    assert strategy.node_buckets[strategy.choose_node(graph.nx_graph)] == '0.0'
+    assert strategy.buckets == {'0.0': 1.0}
+
+
+@pytest.mark.parametrize('seed', range(4))
+@pytest.mark.parametrize('model', [FoodWebModel.NICHE, FoodWebModel.CASCADE])
+def test_greedy_cascade_chooses_the_largest_cascade_at_every_step(model, seed):
+    consumers, resources = generate_food_web(model, 40, 4.0, seed)
+    edge_df = to_edge_df(consumers, resources, species_names(40), SOURCE, TARGET)
+    graph = Graph(GreedyCascade(), edge_df, source=SOURCE, target=TARGET)
+    graph.setup_attack_strategy()
+
+    while graph.size() > 0:
+        largest = max(len(graph.copy().remove_node_and_dependents(node)) for node in graph.nx_graph)
+        node = graph.choose_node()
+        assert len(graph.remove_node_and_dependents(node)) == largest
+
+
+def test_greedy_cascade_rejects_other_extinction_thresholds(niche_web):
+    graph = Graph(GreedyCascade(), niche_web(), source=SOURCE, target=TARGET, extinction_threshold=0.5)
+
+    with pytest.raises(ValueError, match='extinction threshold'):
+        graph.setup_attack_strategy()
@@ -0,0 +1,49 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from graph import Graph
+from attack_strategy import Random, Sequential
+from perturbation import Perturbation
+from branching import BranchingSimulation
+from conftest import SOURCE, TARGET
+
+PREFIX_STEPS = 20
+
+
+def prefix_and_graph(niche_web) -> tuple:
+    graph = Graph(Sequential(metric=Sequential.SortBy.DEGREE), niche_web(), source=SOURCE, target=TARGET)
+    graph.setup_attack_strategy()
+    prefix = Perturbation(0, graph.copy(), save_nodes=True)
+    prefix.run(until_step=PREFIX_STEPS)
+    return prefix, graph
+
+
+def test_continuation_reproduces_the_uninterrupted_run(niche_web, tmp_path):
+    prefix, graph = prefix_and_graph(niche_web)
+    full = Perturbation(0, graph.copy(), save_nodes=True)
+    full.run()
+
+    directory = str(tmp_path / 'results')
+    BranchingSimulation(graph.nx_graph, prefix.snapshot(), k=1, results_dir=directory, processes=1).run()
+
+    results = pd.read_csv(os.path.join(directory, 'perturbation_0000'))
+    pd.testing.assert_frame_equal(results, pd.DataFrame(full.get_metric_evolution()), check_dtype=False)
+    record = np.load(os.path.join(directory, 'extinctions_0000.npz'))
+    for name, values in full.get_extinction_record().items():
+        assert np.array_equal(record[name], values), name
+
+
+def test_random_forks_start_with_the_prefix(niche_web, tmp_path):
+    prefix, graph = prefix_and_graph(niche_web)
+    prefix_rows = pd.DataFrame(prefix.get_metric_evolution())
+    assert len(prefix_rows) > 0
+
+    directory = str(tmp_path / 'results')
+    BranchingSimulation(graph.nx_graph, prefix.snapshot(), k=2, attack_strategy=Random(), results_dir=directory, processes=1).run()
+
+    for perturbation_id in ['0000', '0001']:
+        results = pd.read_csv(os.path.join(directory, f'perturbation_{perturbation_id}'))
+        assert len(results) > len(prefix_rows)
+        pd.testing.assert_frame_equal(results.iloc[:len(prefix_rows)], prefix_rows, check_dtype=False)
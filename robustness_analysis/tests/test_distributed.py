@@ -0,0 +1,45 @@
+from multiprocessing.connection import Client
+import threading
+import os
+
+from graph import Graph
+from attack_strategy import Random
+from distributed import Coordinator, run_worker
+from conftest import SOURCE, TARGET
+
+AUTHKEY = b'test-key'
+
+
+def test_expired_lease_is_requeued_and_all_perturbations_complete(niche_web, tmp_path):
+    graph = Graph(Random(), niche_web(40), source=SOURCE, target=TARGET)
+    graph.setup_attack_strategy()
+
+    k = 4
+    coordinator = Coordinator(('localhost', 0), AUTHKEY, results_dir=str(tmp_path), lease_timeout=1.0)
+    coordinator.add_scenario('random', graph, k=k, save_nodes=True)
+    coordinator_thread = threading.Thread(target=coordinator.run, daemon=True)
+    coordinator_thread.start()
+
+    # A worker which takes a task and never answers
+    silent = Client(coordinator.address, authkey=AUTHKEY)
+    silent.send(('get_task',))
+    reply = silent.recv()
+    assert reply[0] == 'task'
+    abandoned = reply[1]['task_id']
+
+    workers = [threading.Thread(target=run_worker, args=(coordinator.address, AUTHKEY), daemon=True) for _ in range(2)]
+    for worker in workers:
+        worker.start()
+
+    coordinator_thread.join(timeout=60)
+    assert not coordinator_thread.is_alive()
+    for worker in workers:
+        worker.join(timeout=10)
+        assert not worker.is_alive()
+    silent.close()
+
+    assert abandoned in coordinator.completed
+    assert len(coordinator.completed) == k and not coordinator.leased and not coordinator.pending
+    for i in range(k):
+        assert os.path.exists(tmp_path / 'random' / f'perturbation_{i:04}')
+        assert os.path.exists(tmp_path / 'random' / f'extinctions_{i:04}.npz')
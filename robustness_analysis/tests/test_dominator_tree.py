@@ -0,0 +1,85 @@
+import random
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from graph import Graph
+from attack_strategy import Random
+from dominator_tree import DominatorTree
+from food_web_generator import FoodWebModel, generate_food_web, species_names, to_edge_df
+from conftest import SOURCE, TARGET
+
+VIRTUAL_ROOT = '__root__'
+
+
+def build_graph(model: FoodWebModel, seed: int) -> Graph:
+    consumers, resources = generate_food_web(model, 50, 4.0, seed)
+    return Graph(Random(), to_edge_df(consumers, resources, species_names(50), SOURCE, TARGET), source=SOURCE, target=TARGET)
+
+
+def brute_force_cascade(graph: Graph, species: str) -> set:
+    return set(graph.copy().remove_node_and_dependents(species))
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('model', [FoodWebModel.NICHE, FoodWebModel.CASCADE])
+def test_immediate_dominators_match_networkx(model, seed):
+    graph = build_graph(model, seed)
+    tree = DominatorTree.from_nx_graph(graph.nx_graph)
+
+    rooted = graph.nx_graph.copy()
+    rooted.remove_edges_from(nx.selfloop_edges(rooted))
+    rooted.add_edges_from((VIRTUAL_ROOT, species) for species in graph.nx_graph if rooted.in_degree(species) == 0)
+    expected = nx.immediate_dominators(rooted, VIRTUAL_ROOT)
+
+    for i, species in enumerate(tree.graph.names):
+        if species not in expected:
+            assert tree.idom[i] == DominatorTree.UNREACHABLE
+        elif expected[species] == VIRTUAL_ROOT:
+            assert tree.idom[i] == DominatorTree.ROOT
+        else:
+            assert tree.graph.names[tree.idom[i]] == expected[species]
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_cascade_sizes_match_removals_on_acyclic_webs(seed):
+    graph = build_graph(FoodWebModel.CASCADE, seed)
+    tree = DominatorTree.from_nx_graph(graph.nx_graph)
+
+    for species in graph.nx_graph:
+        cascade = brute_force_cascade(graph, species)
+        assert set(tree.dominated(species)) == cascade
+        assert tree.cascade_size(species) == len(cascade)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_cascade_sizes_bound_removals_with_feeding_cycles(seed):
+    graph = build_graph(FoodWebModel.NICHE, seed)
+    tree = DominatorTree.from_nx_graph(graph.nx_graph)
+
+    for i, species in enumerate(tree.graph.names):
+        if tree.idom[i] != DominatorTree.UNREACHABLE:
+            assert brute_force_cascade(graph, species) <= set(tree.dominated(species))
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('model', [FoodWebModel.NICHE, FoodWebModel.CASCADE])
+def test_removals_update_the_tree_as_a_recomputation(model, seed):
+    graph = build_graph(model, seed)
+    tree = DominatorTree.from_nx_graph(graph.nx_graph)
+    order = list(graph.nx_graph)
+    random.Random(seed).shuffle(order)
+
+    for species in order:
+        if species not in graph.nx_graph:
+            continue
+        removed = [species] + graph.remove_node_and_dependents(species)
+        before = tree.cascade_sizes.copy()
+        invalid = tree.remove([tree.graph.index[name] for name in removed])
+
+        expected = DominatorTree.from_nx_graph(graph.nx_graph)
+        alive = [tree.graph.index[name] for name in expected.graph.names]
+        assert (tree.cascade_sizes[alive] == expected.cascade_sizes).all()
+        changed = set(np.flatnonzero(tree.alive & (tree.cascade_sizes != before)).tolist())
+        assert changed <= set(invalid.tolist())
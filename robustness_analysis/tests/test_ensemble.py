@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+
+from metaweb import Metaweb, ProcessingStrategy
+from ensemble import MetawebEnsemble
+from worker_state import seed_random
+import constants
+
+SOURCE, TARGET = constants.SOURCE_COL, constants.TARGET_COL
+
+
+def base_metaweb(n_birds: int = 10, n_raptors: int = 6, n_insects: int = 40, seed: int = 0) -> pd.DataFrame:
+    """
+    Returns a metaweb of birds feeding on random sets of the insects of the metaweb_processor fixture,
+    and raptors feeding on the birds. Only consumers which are also prey lose links in sample_links_to_remove.
+    """
+    rng = np.random.default_rng(seed)
+    links = [(f'bird_{i}', f'insect_{j}') for i in range(n_birds) for j in rng.choice(n_insects, size=rng.integers(2, 12), replace=False)]
+    links += [(f'raptor_{i}', f'bird_{j}') for i in range(n_raptors) for j in rng.choice(n_birds, size=rng.integers(3, 8), replace=False)]
+    return pd.DataFrame(links, columns=[SOURCE, TARGET])
+
+
+def edge_set(edges: pd.DataFrame) -> set:
+    return set(edges[[SOURCE, TARGET]].itertuples(index=False, name=None))
+
+
+def test_realizations_match_metaweb_setup(metaweb_processor, tmp_path):
+    processor = metaweb_processor()
+    base = base_metaweb()
+    base.to_csv(tmp_path / 'metaweb.csv', index=False)
+    ensemble = MetawebEnsemble(base)
+    ensemble.generate(3, ProcessingStrategy.GENERATE_AND_REMOVE, processor, seed=0, processes=1)
+
+    for i, seed in enumerate(ensemble.seeds):
+        metaweb = Metaweb(str(tmp_path / 'metaweb.csv'), usecols=[SOURCE, TARGET])
+        seed_random(seed)
+        metaweb.setup(ProcessingStrategy.GENERATE_AND_REMOVE, processor)
+        expected = edge_set(metaweb.get_edges())
+
+        compact = ensemble.materialize(i)
+        assert edge_set(ensemble.materialize_edges(i)) == expected
+        assert set(zip(compact.names[compact.consumers], compact.names[compact.resources])) == expected
+        assert expected != edge_set(base)
+
+
+def test_generate_continues_spawning_from_a_used_seed(metaweb_processor):
+    processor = metaweb_processor()
+    ensemble = MetawebEnsemble(base_metaweb())
+    ensemble.generate(2, ProcessingStrategy.REMOVE, processor, seed=0, processes=1)
+    ensemble.generate(2, ProcessingStrategy.REMOVE, processor, seed=0, processes=1)
+    at_once = MetawebEnsemble(base_metaweb())
+    at_once.generate(4, ProcessingStrategy.REMOVE, processor, seed=0, processes=1)
+
+    assert len(set(ensemble.seeds)) == 4
+    assert ensemble.seeds == at_once.seeds
+
+
+def test_save_and_load_round_trip(metaweb_processor, tmp_path):
+    processor = metaweb_processor()
+    ensemble = MetawebEnsemble(base_metaweb())
+    ensemble.generate(3, ProcessingStrategy.GENERATE_AND_REMOVE, processor, seed=0, processes=1)
+    ensemble.save(str(tmp_path / 'ensemble.npz'))
+    loaded = MetawebEnsemble.load(str(tmp_path / 'ensemble.npz'))
+
+    assert list(loaded.names) == list(ensemble.names)
+    assert loaded.seeds == ensemble.seeds
+    for i in range(len(ensemble)):
+        pd.testing.assert_frame_equal(loaded.materialize_edges(i), ensemble.materialize_edges(i))
+
+    ensemble.generate(1, ProcessingStrategy.REMOVE, processor, seed=0, processes=1)
+    loaded.generate(1, ProcessingStrategy.REMOVE, processor, seed=0, processes=1)
+    assert loaded.seeds == ensemble.seeds
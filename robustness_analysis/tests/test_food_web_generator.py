@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from food_web_generator import FoodWebModel, generate_food_web
+
+
+@pytest.mark.parametrize('model, tolerance', [(FoodWebModel.NICHE, 0.1), (FoodWebModel.CASCADE, 0.02)])
+def test_connectance_matches_the_requested_links_per_species(model, tolerance):
+    n_species, links_per_species = 300, 12.0
+    connectances = [len(generate_food_web(model, n_species, links_per_species, seed)[0]) / n_species**2 for seed in range(10)]
+
+    assert np.mean(connectances) == pytest.approx(links_per_species / n_species, rel=tolerance)
+
+
+def test_cascade_consumers_only_feed_on_lower_ranked_species():
+    consumers, resources = generate_food_web(FoodWebModel.CASCADE, 300, 12.0, seed=0)
+    links = consumers * 300 + resources
+
+    assert (resources < consumers).all()
+    assert len(np.unique(links)) == len(links)
+
+
+@pytest.mark.parametrize('model', list(FoodWebModel))
+def test_a_fixed_seed_generates_the_same_web(model):
+    consumers, resources = generate_food_web(model, 200, 8.0, seed=3)
+    same_consumers, same_resources = generate_food_web(model, 200, 8.0, seed=3)
+    other_consumers, other_resources = generate_food_web(model, 200, 8.0, seed=4)
+
+    np.testing.assert_array_equal(consumers, same_consumers)
+    np.testing.assert_array_equal(resources, same_resources)
+    assert not (np.array_equal(consumers, other_consumers) and np.array_equal(resources, other_resources))
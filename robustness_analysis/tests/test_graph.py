@@ -0,0 +1,14 @@
+import pandas as pd
+
+from graph import Graph
+from attack_strategy import Random
+from conftest import SOURCE, TARGET
+
+
+def test_removing_a_cannibal_drives_its_consumers_extinct():
+    # Consumer -> resource: the wolf eats itself and the hare, the eagle only eats the wolf, the hare eats grass
+    edge_df = pd.DataFrame({SOURCE: ['wolf', 'wolf', 'eagle', 'hare'], TARGET: ['wolf', 'hare', 'wolf', 'grass']})
+    graph = Graph(Random(), edge_df, source=SOURCE, target=TARGET)
+
+    assert graph.remove_node_and_dependents('wolf') == ['eagle']
+    assert set(graph.nx_graph) == {'hare', 'grass'}
@@ -0,0 +1,44 @@
+import random
+
+import numpy as np
+import pandas as pd
+
+from graph import Graph
+from attack_strategy import Random
+from compact_graph import CompactGraph
+from habitat_metrics import HabitatTracker
+from perturbation import Perturbation
+from conftest import SOURCE, TARGET
+
+HABITATS = ['Forest', 'Grassland', 'Wetland']
+
+
+def test_habitat_counts_match_a_recount_of_every_step(niche_web):
+    graph = Graph(Random(), niche_web(80), source=SOURCE, target=TARGET)
+    initial_nx_graph = graph.nx_graph.copy()
+    rng = random.Random(0)
+    species_habitats = {species: [habitat for habitat in HABITATS if rng.random() < 0.4] for species in graph.nx_graph}
+    species_df = pd.DataFrame({'Taxon': list(species_habitats), 'Habitat': [';'.join(habitats) or None for habitats in species_habitats.values()]})
+
+    tracker = HabitatTracker.from_species_df(CompactGraph.from_nx_graph(graph.nx_graph), species_df)
+    perturbation = Perturbation(0, graph, save_nodes=True, habitat_tracker=tracker)
+    random.seed(1)
+    perturbation.run()
+
+    record = perturbation.get_extinction_record()
+    names = graph.species_names
+    evolution = tracker.evolution
+    assert tracker.habitats == HABITATS
+
+    state = initial_nx_graph.copy()
+    for step in range(len(evolution['graph_size'])):
+        assert evolution['graph_size'][step] == len(state)
+        for habitat in HABITATS:
+            subgraph = state.subgraph([species for species in state if habitat in species_habitats[species]])
+            species, edges = subgraph.number_of_nodes(), subgraph.number_of_edges()
+            assert evolution[f'{habitat}_graph_size'][step] == species
+            assert evolution[f'{habitat}_number_of_edges'][step] == edges
+            assert evolution[f'{habitat}_avg_total_degree'][step] == (round(2 * edges / species, 5) if species else 0)
+        state.remove_nodes_from(names[record['species'][record['step'] == step]])
+
+    assert len(state) == 0 and np.all(tracker.species_count == 0) and np.all(tracker.edge_count == 0)
@@ -0,0 +1,65 @@
+import json
+import os
+
+from graph import Graph
+from attack_strategy import Sequential
+from perturbation import Perturbation
+from simulation import Simulation
+from instrumentation import Instrumentation, aggregate
+from conftest import SOURCE, TARGET
+
+
+def sequential_graph(niche_web) -> Graph:
+    graph = Graph(Sequential(metric=Sequential.SortBy.DEGREE), niche_web(), source=SOURCE, target=TARGET)
+    graph.setup_attack_strategy()
+    return graph
+
+
+def test_perturbation_records_phases_and_cascades(niche_web):
+    graph = sequential_graph(niche_web)
+    n_species = graph.size()
+    perturbation = Perturbation(0, graph, save_nodes=False, instrumentation=Instrumentation())
+    perturbation.run()
+    summary = perturbation.instrumentation.summary()
+
+    steps = summary['steps']
+    assert steps == perturbation.step
+    assert steps + sum(summary['cascade_sizes']) == n_species
+    for phase in ['compute_metrics', 'choose_node', 'remove_node_and_dependents']:
+        assert summary['calls'][phase] == steps
+    assert summary['calls']['submit_metrics'] == summary['calls']['collect_metrics'] == 0
+    assert 0 < summary['wall_time']['compute_metrics'] <= summary['total_time']
+
+
+def test_aggregate_combines_the_summaries():
+    def summary(wall_time: dict, calls: dict, cascade_sizes: list, total_time: float, peak: float) -> dict:
+        return {'total_time': total_time, 'wall_time': {**dict.fromkeys(Instrumentation.PHASES, 0.0), **wall_time},
+                'calls': {**dict.fromkeys(Instrumentation.PHASES, 0), **calls}, 'steps': len(cascade_sizes),
+                'cascade_sizes': cascade_sizes, 'worker_peak_rss_mb': peak}
+
+    combined = aggregate([summary({'choose_node': 1.0}, {'choose_node': 2}, [0, 4], 4.0, 10.0),
+                          summary({'choose_node': 2.0}, {'choose_node': 4}, [2], 4.0, 30.0)])
+
+    assert combined['perturbations'] == 2
+    assert combined['total_time'] == 8.0
+    assert combined['wall_time']['choose_node'] == 3.0
+    assert combined['calls']['choose_node'] == 6
+    assert combined['time_per_call']['choose_node'] == 0.5
+    assert combined['time_share']['choose_node'] == 3.0 / 8.0
+    assert combined['time_per_call']['compute_metrics'] == 0.0
+    assert combined['cascade_sizes'] == {'primary_removals': 3, 'mean': 2.0, 'max': 4, 'p50': 2.0, 'p99': 3.96}
+    assert combined['worker_peak_rss_mb'] == 30.0
+    assert aggregate([])['cascade_sizes']['primary_removals'] == 0
+
+
+def test_simulation_exports_the_instrumentation_and_profile(niche_web, tmp_path):
+    directory = str(tmp_path / 'results')
+    simulation = Simulation(sequential_graph(niche_web), k=1, results_dir=directory, instrument=True, profile_id=0)
+    simulation.run()
+
+    with open(os.path.join(directory, 'instrumentation_summary.json')) as f:
+        assert json.load(f)['cascade_sizes']['primary_removals'] == simulation.instrumentation[0]['steps']
+    assert os.path.exists(os.path.join(directory, 'instrumentation_0000.json'))
+    assert os.path.exists(os.path.join(directory, 'profile_0000.prof'))
+    with open(os.path.join(directory, 'memory_0000.txt')) as f:
+        assert f.readline().startswith('peak traced memory')
@@ -0,0 +1,18 @@
+from worker_state import seed_random
+
+
+def test_generate_links_draws_from_the_diet(metaweb_processor):
+    seed_random(0)
+    links = metaweb_processor().generate_links()
+
+    assert list(links.columns) == ['Source_Name', 'Target_Name']
+    assert not links.empty
+    assert links['Source_Name'].str.startswith('spider_').all()
+    assert links['Target_Name'].str.startswith('insect_').all()
+
+
+def test_generate_links_without_matching_diet_is_empty(metaweb_processor):
+    links = metaweb_processor(spider_habitat='Wetland').generate_links()
+
+    assert list(links.columns) == ['Source_Name', 'Target_Name']
+    assert links.empty
@@ -0,0 +1,8 @@
+from metric_calculator import MetricCalculator
+from replay import INCREMENTAL_METRICS
+
+
+def test_available_metrics_are_metric_methods():
+    assert all(callable(getattr(MetricCalculator, metric, None)) for metric in MetricCalculator.AVAILABLE_METRICS)
+    assert len(set(MetricCalculator.AVAILABLE_METRICS)) == len(MetricCalculator.AVAILABLE_METRICS)
+    assert set(MetricCalculator.METRICS) | INCREMENTAL_METRICS <= set(MetricCalculator.AVAILABLE_METRICS)
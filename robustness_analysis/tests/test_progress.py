@@ -0,0 +1,28 @@
+from progress import ProgressReporter, format_duration
+
+
+def event(perturbation_id, kind, now, remaining, steps, steps_per_second, initial_size=100):
+    return {'event': kind, 'id': perturbation_id, 'time': now, 'initial_size': initial_size,
+            'remaining': remaining, 'steps': steps, 'steps_per_second': steps_per_second}
+
+
+def test_just_started_perturbation_is_not_a_straggler():
+    reporter = ProgressReporter(None, k=3)
+    events = [event('0000', 'progress', 100.0, 20, 80, 2.0),
+              event('0001', 'progress', 100.0, 30, 70, 1.8),
+              event('0002', 'started', 100.0, 100, 0, 0.0)]
+    assert reporter._stragglers(events, now=101.0) == []
+
+
+def test_slow_and_stalled_perturbations_are_stragglers():
+    reporter = ProgressReporter(None, k=4, stall_timeout=60.0)
+    events = [event('0000', 'progress', 100.0, 20, 80, 2.0),
+              event('0001', 'progress', 100.0, 90, 10, 0.5),
+              event('0002', 'progress', 100.0, 95, 5, 1.9),
+              event('0003', 'started', 10.0, 100, 0, 0.0)]
+    assert reporter._stragglers(events, now=101.0) == ['0001', '0003']
+
+
+def test_format_duration_does_not_wrap_after_a_day():
+    assert format_duration(38 * 3600) == '38:00:00'
+    assert format_duration(3725.4) == '01:02:05'
@@ -0,0 +1,81 @@
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+from graph import Graph
+from attack_strategy import Random
+from compact_graph import CompactGraph
+from metric_calculator import MetricCalculator
+from query_service import WhatIfEngine, QueryService
+from food_web_generator import FoodWebModel, generate_food_web, species_names, to_edge_df
+from conftest import SOURCE, TARGET
+
+
+@pytest.fixture(scope='module')
+def service():
+    consumers, resources = generate_food_web(FoodWebModel.NICHE, 60, 4.0, 0)
+    edge_df = to_edge_df(consumers, resources, species_names(60), SOURCE, TARGET)
+    service = QueryService(WhatIfEngine(CompactGraph.from_edge_df(edge_df, SOURCE, TARGET)), port=0)
+    service.start()
+    yield service, edge_df
+    service.stop()
+
+
+def post(service: QueryService, path: str, body) -> tuple:
+    data = body if isinstance(body, bytes) else json.dumps(body).encode()
+    request = urllib.request.Request(f'http://{service.address[0]}:{service.address[1]}{path}', data=data, method='POST')
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as error:
+        return error.code, json.loads(error.read())
+
+
+@pytest.mark.parametrize('threshold', [1.0, 0.5])
+def test_cascade_and_metrics_match_graph_removals(service, threshold):
+    service, edge_df = service
+    graph = Graph(Random(), edge_df, source=SOURCE, target=TARGET, extinction_threshold=threshold)
+    removed = list(graph.nx_graph)[:10:3]
+
+    dead = set(removed)
+    for species in removed:
+        if species in graph.nx_graph:
+            dead.update(graph.remove_node_and_dependents(species))
+
+    status, cascade = post(service, '/cascade', {'removed': removed, 'threshold': threshold})
+    assert status == 200
+    assert set(cascade['primary']) == set(removed)
+    assert set(cascade['secondary']) == dead - set(removed)
+    assert cascade['remaining'] == graph.size()
+
+    status, metrics = post(service, '/metrics', {'removed': removed[::-1] + removed[:1], 'threshold': threshold})
+    assert status == 200
+    expected = MetricCalculator(MetricCalculator.METRICS + ['largest_wcc_size']).compute_metrics(graph.nx_graph)
+    assert {metric: metrics[metric] for metric in expected} == pytest.approx(expected)
+    assert metrics['secondary'] == len(dead) - len(removed)
+
+
+def test_reordered_queries_hit_the_cache(service):
+    service, edge_df = service
+    species = list(CompactGraph.from_edge_df(edge_df, SOURCE, TARGET).names[:3])
+
+    assert post(service, '/cascade', {'removed': species})[1]['cached'] is False
+    assert post(service, '/cascade', {'removed': species[::-1] + species[:1]})[1]['cached'] is True
+
+
+@pytest.mark.parametrize('path, body', [
+    ('/cascade', {'removed': ['not a species']}),
+    ('/cascade', {'removed': [], 'threshold': 0}),
+    ('/metrics', {'removed': [], 'unexpected': 1}),
+    ('/cascade', b'not json'),
+    ('/cascade', [1, 2]),
+    ('/scenario', {'attack': 'unknown', 'k': 1}),
+    ('/scenario', {'attack': 'degree', 'k': -1}),
+    ('/unknown', {}),
+])
+def test_invalid_queries_are_rejected(service, path, body):
+    status, response = post(service[0], path, body)
+    assert status == 400
+    assert 'error' in response
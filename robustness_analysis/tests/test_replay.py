@@ -0,0 +1,67 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from graph import Graph
+from attack_strategy import Random
+from metric_calculator import MetricCalculator
+from simulation import Simulation, remove_results_dir
+from replay import Replay
+from file_exporter import results_directory, export_arrays
+from conftest import SOURCE, TARGET
+
+
+def test_replay_reproduces_the_saved_metrics(niche_web, tmp_path):
+    graph = Graph(Random(), niche_web(), source=SOURCE, target=TARGET)
+    graph.metric_calculator = MetricCalculator(MetricCalculator.METRICS + ['largest_wcc_size'])
+    initial_nx_graph = graph.nx_graph.copy()
+    directory = str(tmp_path / 'results')
+    Simulation(graph, k=3, save_nodes=True, results_dir=directory).run()
+
+    paths = sorted(os.path.join(directory, name) for name in os.listdir(directory) if name.startswith('perturbation_'))
+    saved = {path: pd.read_csv(path) for path in paths}
+    replayed_metrics = MetricCalculator.METRICS[1:] + ['largest_wcc_size']
+    for path, results in saved.items():
+        results.drop(columns=replayed_metrics).to_csv(path, index=False)
+
+    Replay(initial_nx_graph, replayed_metrics, directory=directory, processes=1).run()
+
+    assert len(paths) == 3
+    for path, results in saved.items():
+        pd.testing.assert_frame_equal(pd.read_csv(path)[results.columns], results, check_dtype=False)
+
+
+def test_remove_results_dir_resolves_relative_paths_like_the_exports(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # a relative path must not be resolved against the working directory
+    directory = os.path.relpath(tmp_path / 'results', os.path.dirname(results_directory()))
+    os.makedirs(results_directory(directory))
+
+    remove_results_dir(directory)
+    assert not os.path.exists(tmp_path / 'results')
+
+
+def saved_run(niche_web, directory: str) -> Graph:
+    graph = Graph(Random(), niche_web(), source=SOURCE, target=TARGET)
+    initial_nx_graph = graph.nx_graph.copy()
+    Simulation(graph, k=1, save_nodes=True, results_dir=directory).run()
+    return initial_nx_graph
+
+
+@pytest.mark.parametrize('metric', ['compute_metrics', 'degree_metrics', 'DECIMAL_POS', 'avg_degree'])
+def test_replay_rejects_names_which_are_not_metrics(niche_web, tmp_path, metric):
+    initial_nx_graph = saved_run(niche_web, str(tmp_path / 'results'))
+
+    with pytest.raises(ValueError, match='Unknown metrics'):
+        Replay(initial_nx_graph, [metric], directory=str(tmp_path / 'results'), processes=1)
+
+
+def test_replay_rejects_empty_extinction_records(niche_web, tmp_path):
+    directory = str(tmp_path / 'results')
+    initial_nx_graph = saved_run(niche_web, directory)
+    empty = {key: np.array([], dtype=np.int32) for key in ['species', 'removal_type', 'step', 'trigger']}
+    export_arrays(empty, 'extinctions_0000', directory=directory)
+
+    with pytest.raises(ValueError, match=r"perturbations \['0000'\] are empty"):
+        Replay(initial_nx_graph, ['largest_wcc_size'], directory=directory, processes=1).run()
@@ -0,0 +1,24 @@
+import os
+
+from graph import Graph
+from attack_strategy import Sequential
+from metric_calculator import MetricCalculator
+from simulation import Simulation
+from conftest import SOURCE, TARGET
+
+
+def run_simulation(niche_web, directory: str, pipeline: bool) -> bytes:
+    graph = Graph(Sequential(metric=Sequential.SortBy.DEGREE), niche_web(), source=SOURCE, target=TARGET)
+    graph.setup_attack_strategy()
+    graph.metric_calculator = MetricCalculator(MetricCalculator.METRICS + ['largest_wcc_size'])
+    Simulation(graph, k=1, save_nodes=True, results_dir=directory, pipeline=pipeline).run()
+    with open(os.path.join(directory, 'perturbation_0000'), 'rb') as file:
+        return file.read()
+
+
+def test_pipeline_mode_matches_the_pool_mode(niche_web, tmp_path):
+    pooled = run_simulation(niche_web, str(tmp_path / 'pool'), pipeline=False)
+    pipelined = run_simulation(niche_web, str(tmp_path / 'pipeline'), pipeline=True)
+
+    assert pooled
+    assert pipelined == pooled
@@ -0,0 +1,43 @@
+import random
+
+import numpy as np
+import pytest
+
+from graph import Graph
+from attack_strategy import Random
+from compact_graph import CompactGraph
+from threshold_sweep import ThresholdSweep
+from conftest import SOURCE, TARGET
+
+THRESHOLDS = [0.25, 0.5, 0.75, 1.0]
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_sweep_matches_independent_runs_per_threshold(niche_web, seed):
+    edge_df = niche_web(seed=seed)
+    lenient = Graph(Random(), edge_df, source=SOURCE, target=TARGET, extinction_threshold=THRESHOLDS[-1])
+    sweep = ThresholdSweep(CompactGraph.from_nx_graph(lenient.nx_graph), THRESHOLDS)
+
+    # Removal order of a random perturbation under the most lenient threshold
+    order = list(lenient.nx_graph)
+    random.Random(seed).shuffle(order)
+    primary = []
+    for species in order:
+        if species in lenient.nx_graph:
+            lenient.remove_node_and_dependents(species)
+            primary.append(species)
+            sweep.remove(sweep.graph.index[species])
+
+    remaining = np.array(sweep.remaining)
+    already_extinct = 0
+    for i, threshold in enumerate(THRESHOLDS):
+        graph = Graph(Random(), edge_df, source=SOURCE, target=TARGET, extinction_threshold=threshold)
+        sizes = []
+        for species in primary:
+            if species in graph.nx_graph:
+                graph.remove_node_and_dependents(species)
+            else:
+                already_extinct += 1  # chosen under the lenient threshold, gone under this stricter one
+            sizes.append(graph.size())
+        assert remaining[:, i].tolist() == sizes
+    assert already_extinct > 0
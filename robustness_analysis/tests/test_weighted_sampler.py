@@ -0,0 +1,70 @@
+import random
+
+import pytest
+
+from graph import Graph
+from attack_strategy import WeightedAttack
+from weighted_sampler import WeightedSampler
+from conftest import SOURCE, TARGET
+
+
+def test_samples_follow_the_weights():
+    weights = [1.0, 0.0, 2.0, 3.0, 4.0]
+    sampler = WeightedSampler(weights)
+    random.seed(0)
+
+    draws = 50000
+    counts = [0] * len(weights)
+    for _ in range(draws):
+        counts[sampler.sample()] += 1
+
+    assert counts[1] == 0
+    for count, weight in zip(counts, weights):
+        assert count / draws == pytest.approx(weight / sum(weights), abs=0.01)
+
+
+def test_pops_every_weighted_item_once():
+    sampler = WeightedSampler([0.5, 0.0, 3.0, 1.0, 0.0, 2.0])
+    random.seed(1)
+
+    popped = [sampler.pop() for _ in range(len(sampler))]
+
+    assert sorted(popped) == [0, 2, 3, 5]
+    assert len(sampler) == 0 and sampler.total() == 0
+    with pytest.raises(IndexError):
+        sampler.sample()
+
+
+def test_updates_keep_the_prefix_sums_consistent():
+    rng = random.Random(2)
+    weights = [rng.random() for _ in range(37)]
+    sampler = WeightedSampler(weights)
+
+    for _ in range(200):
+        item, weight = rng.randrange(len(weights)), rng.choice([0.0, rng.random()])
+        sampler.update(item, weight)
+        weights[item] = weight
+        end = rng.randrange(len(weights) + 1)
+        assert sampler._prefix_sum(end) == pytest.approx(sum(weights[:end]))
+        assert len(sampler) == sum(weight > 0 for weight in weights)
+
+    sampler.update(3, 5.0)
+    with pytest.raises(ValueError):
+        sampler.update(3, -1.0)
+    random.seed(3)
+    assert sum(sampler.sample() == 3 for _ in range(5000)) / 5000 == pytest.approx(5.0 / sampler.total(), abs=0.02)
+
+
+def test_weighted_attack_takes_out_secondary_removals(niche_web):
+    graph = Graph(WeightedAttack({}, default_weight=1.0), niche_web(), source=SOURCE, target=TARGET)
+    graph.setup_attack_strategy()
+    strategy = graph.attack_strategy
+    random.seed(4)
+
+    while graph.size() > 0:
+        node = graph.choose_node()
+        assert node in graph.nx_graph
+        dependents = graph.remove_node_and_dependents(node)
+        removed = [node] + dependents
+        assert all(strategy.sampler.weights[strategy.index[species]] == 0 for species in removed)
+        assert len(strategy.sampler) == graph.size()
@@ -0,0 +1,109 @@
+from compact_graph import CompactGraph
+import numpy as np
+
+
+def required_losses(initial_prey, threshold):
+    """
+    Returns the number of prey a consumer must lose to go extinct, i.e. the given fraction of its initial prey
+    rounded up, and at least one. Works on single values and on numpy arrays.
+    """
+    return np.maximum(1, np.ceil(np.multiply(threshold, initial_prey) - 1e-9)).astype(np.int32)
+
+
+class ThresholdSweep:
+    """
+    Applies one sequence of primary removals to several extinction thresholds at once.
+
+    The removal order comes from a perturbation run with the most lenient threshold. Extinctions are monotone
+    in the threshold, so a species chosen there is either still alive or already extinct under every stricter
+    threshold, in which case the removal has no effect. Every threshold keeps its own prey loss counters in one
+    row of a (thresholds x species) array, and the cascades of all thresholds are propagated together,
+    level by level, on the flattened arrays.
+
+    Attributes:
+    -----------
+    thresholds : np.ndarray
+        Fractions of their initial prey consumers must lose to go extinct.
+    lost : np.ndarray
+        Number of prey lost by every species under every threshold.
+    alive : np.ndarray
+        Whether every species is alive under every threshold.
+    extinction_step : np.ndarray
+        Step at which every species went extinct under every threshold, -1 while alive.
+    remaining : list
+        Number of species alive under every threshold after every step.
+    """
+
+    def __init__(self, graph: CompactGraph, thresholds: list) -> None:
+        """
+        Parameters:
+        -----------
+        graph : CompactGraph
+            The intact food web, whose species ids are used by remove.
+        thresholds : list
+            Extinction thresholds in (0, 1].
+        """
+        self.graph = graph
+        self.thresholds = np.array(sorted(set(thresholds)), dtype=np.float64)
+        if len(self.thresholds) == 0 or self.thresholds[0] <= 0 or self.thresholds[-1] > 1:
+            raise ValueError("The extinction thresholds must be in (0, 1]")
+
+        n = len(graph)
+        self.n_species = n
+        self.required = required_losses(graph.prey_count[None, :], self.thresholds[:, None]).ravel()
+        self.lost = np.zeros(len(self.thresholds) * n, dtype=np.int32)
+        self.alive = np.ones(len(self.thresholds) * n, dtype=bool)
+        self.extinction_step = np.full(len(self.thresholds) * n, -1, dtype=np.int32)
+        self.alive_count = np.full(len(self.thresholds), n, dtype=np.int64)
+        self.remaining = []
+        self.step = 0
+
+
+    def remove(self, species: int) -> None:
+        """
+        Removes a species under every threshold it is still alive in, followed by the cascades it causes.
+        """
+        n = self.n_species
+        frontier = np.arange(len(self.thresholds)) * n + species
+        frontier = frontier[self.alive[frontier]]
+        self._kill(frontier)
+
+        while frontier.size:
+            # Consumers of the frontier species, in the row of the threshold they died in
+            sources = frontier % n
+            resources, consumers = self.graph.consumer_links(sources)
+            rows = np.repeat(frontier - sources, self.graph.consumer_ptr[sources + 1] - self.graph.consumer_ptr[sources])
+            links = rows + consumers
+            links = links[(consumers != resources) & self.alive[links]]
+            np.add.at(self.lost, links, 1)
+
+            candidates = np.unique(links)
+            frontier = candidates[self.lost[candidates] >= self.required[candidates]]
+            self._kill(frontier)
+
+        self.remaining.append(self.alive_count.copy())
+        self.step += 1
+
+
+    def _kill(self, flat: np.ndarray) -> None:
+        self.alive[flat] = False
+        self.extinction_step[flat] = self.step
+        self.alive_count -= np.bincount(flat // self.n_species, minlength=len(self.thresholds))
+
+
+    def to_dict(self) -> dict:
+        """
+        Returns the number of species remaining under every threshold after every primary removal.
+        """
+        remaining = np.array(self.remaining).reshape(-1, len(self.thresholds))
+        data = {'step': np.arange(self.step)}
+        for i, threshold in enumerate(self.thresholds):
+            data[f'remaining_{threshold:g}'] = remaining[:, i]
+        return data
+
+
+    def to_arrays(self) -> dict:
+        """
+        Returns the thresholds and the extinction step of every species under every threshold (thresholds x species).
+        """
+        return {'thresholds': self.thresholds, 'extinction_step': self.extinction_step.reshape(len(self.thresholds), -1)}
@@ -0,0 +1,117 @@
+import random
+
+
+class WeightedSampler:
+    """
+    Samples items without replacement with probability proportional to their weights.
+
+    The weights are stored in a Fenwick (binary indexed) tree of prefix sums, so that drawing an item,
+    removing it or changing its weight costs O(log n) instead of a scan over all items. Both are plain
+    lists, which are faster than numpy arrays for the single element accesses of the tree walks.
+
+    Attributes:
+    -----------
+    weights : list
+        Current weight of every item, 0 for removed items.
+    tree : list
+        Fenwick tree over the weights, tree[i] holds the sum of the weights of items (i - lowbit(i), i].
+    """
+
+    def __init__(self, weights: list) -> None:
+        """
+        Parameters:
+        -----------
+        weights : list
+            Non-negative weight of every item, e.g. a column of a DataFrame.
+        """
+        self.weights = [float(weight) for weight in weights]
+        if any(weight < 0 for weight in self.weights):
+            raise ValueError("Weights must be non-negative")
+
+        n = len(self.weights)
+        self.tree = [0.0] + self.weights
+        for i in range(1, n + 1):  # O(n) construction, each node passes its sum to its parent
+            parent = i + (i & -i)
+            if parent <= n:
+                self.tree[parent] += self.tree[i]
+
+        self.mask = 1 << (n.bit_length() - 1) if n else 0
+        self.remaining = sum(weight > 0 for weight in self.weights)
+
+
+    def __len__(self) -> int:
+        """
+        Returns the number of items with a positive weight.
+        """
+        return self.remaining
+
+
+    def total(self) -> float:
+        return self._prefix_sum(len(self.weights))
+
+
+    def update(self, item: int, weight: float) -> None:
+        """
+        Sets the weight of an item.
+        """
+        if weight < 0:
+            raise ValueError("Weights must be non-negative")
+        self.remaining += (weight > 0) - (self.weights[item] > 0)
+        delta = weight - self.weights[item]
+        self.weights[item] = weight
+
+        i = item + 1
+        while i < len(self.tree):
+            self.tree[i] += delta
+            i += i & -i
+
+
+    def remove(self, item: int) -> None:
+        """
+        Removes an item, e.g. a species which went extinct in a cascade. Removing an item twice has no effect.
+        """
+        if self.weights[item] > 0:
+            self.update(item, 0.0)
+
+
+    def sample(self) -> int:
+        """
+        Draws an item with probability proportional to its weight, using the random module so that
+        random.seed makes the draws reproducible.
+        """
+        if not self.remaining:
+            raise IndexError("sample from an empty sampler")
+
+        # Descend the tree, skipping every subtree whose weight lies entirely below the target
+        target = random.random() * self.total()
+        position, step = 0, self.mask
+        while step:
+            child = position + step
+            if child < len(self.tree) and self.tree[child] <= target:
+                position = child
+                target -= self.tree[child]
+            step >>= 1
+
+        # Rounding can point past the last positive weight, fall back to the closest positive item
+        while position < len(self.weights) and self.weights[position] <= 0:
+            position += 1
+        if position == len(self.weights):
+            position = max(i for i, weight in enumerate(self.weights) if weight > 0)
+        return position
+
+
+    def pop(self) -> int:
+        """
+        Draws an item and removes it.
+        """
+        item = self.sample()
+        self.remove(item)
+        return item
+
+
+    def _prefix_sum(self, end: int) -> float:
+        total, i = 0.0, end
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
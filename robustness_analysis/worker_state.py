@@ -0,0 +1,33 @@
+import numpy as np
+import random
+
+"""
+Helpers shared by the process pools of the simulations: the data installed once in every worker by the pool
+initializer, so that tasks only carry their ids, and the seeding of a task.
+"""
+
+_worker_state = {}
+
+
+def init_worker(state: dict) -> None:
+    """
+    Pool initializer installing the given data in the worker, e.g. Pool(initializer=init_worker, initargs=(state,)).
+    """
+    _worker_state.clear()
+    _worker_state.update(state)
+
+
+def worker_state() -> dict:
+    """
+    Returns the data installed in the current worker by init_worker.
+    """
+    return _worker_state
+
+
+def seed_random(seed: int) -> None:
+    """
+    Seeds the random module and the global numpy generator, which are both used by the attack strategies
+    and the metaweb processing.
+    """
+    random.seed(seed)
+    np.random.seed(seed % 2**32)